@@ -24,12 +24,23 @@ Output formats: json (default), table, markdown, csv
 from __future__ import annotations
 
 import argparse
+import bisect
 import csv
+import heapq
 import io
+import itertools
 import json
 import math
+import operator
+import re
 import sys
-from typing import Any
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
 
 
 # ---------------------------------------------------------------------------
@@ -68,47 +79,91 @@ def parse_weights_arg(weights_str: str) -> dict[str, float]:
     return result
 
 
+# Exception-free pre-checks: anything float() accepts has a digit or is
+# inf/nan, and nothing int() accepts contains one of ".eEnN".
+_MAYBE_NUMBER = re.compile(r"[\dnN]")
+_NOT_INT = re.compile(r"[.eEnN]")
+
+
+def _coerce_cell(v: str, kind: type) -> int | float | str:
+    """int(v), else float(v), else v itself.
+
+    ``kind`` is the type the previous cell in the column became. It only picks
+    which pre-check is worth running, so the result never depends on it.
+    """
+    if kind is str and not _MAYBE_NUMBER.search(v):
+        return v
+    if kind is not float or not _NOT_INT.search(v):
+        try:
+            return int(v)
+        except ValueError:
+            pass
+    try:
+        return float(v)
+    except ValueError:
+        return v
+
+
 def read_csv_input(text: str) -> list[dict[str, Any]]:
     """Parse CSV with auto numeric conversion."""
-    reader = csv.DictReader(io.StringIO(text))
+    return read_csv_lines(io.StringIO(text))
+
+
+def read_csv_lines(lines: Iterable[str]) -> list[dict[str, Any]]:
+    """Parse CSV from any line iterable (e.g. an open file), row by row."""
+    reader = csv.reader(itertools.dropwhile(str.isspace, lines))
+    header = next(reader, None)
+    if header is None:
+        return []
+    kinds: list[type] = [int] * len(header)
     items: list[dict[str, Any]] = []
     for row in reader:
+        if not row:
+            continue
         item: dict[str, Any] = {}
-        for k, v in row.items():
-            if k is None:
-                continue
-            try:
-                item[k] = int(v)
-            except ValueError:
-                try:
-                    item[k] = float(v)
-                except ValueError:
-                    item[k] = v
+        # Cells past the header are dropped; short rows just lack the tail
+        for col, (k, v) in enumerate(zip(header, row, strict=False)):
+            item[k] = value = _coerce_cell(v, kinds[col])
+            kinds[col] = type(value)
         items.append(item)
     return items
 
 
+def _json_loads(text: str) -> object:
+    """json.loads, via orjson when it happens to be installed."""
+    try:
+        # Imported on first use so that CSV input never pays for it
+        import orjson  # noqa: PLC0415
+    except ImportError:
+        return json.loads(text)
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        # NaN/Infinity literals, oversized ints: defer to the stdlib parser
+        return json.loads(text)
+
+
 def load_input(
     file_path: str | None,
 ) -> tuple[list[dict[str, Any]], dict[str, Any] | None]:
     """Load input. Returns (configs, structured_meta_or_None)."""
+    if file_path and file_path != "-" and file_path.endswith(".csv"):
+        # Stream rows straight from the file instead of slurping it first
+        with Path(file_path).open(newline="", buffering=1 << 16) as f:
+            return read_csv_lines(f), None
+
     if file_path is None or file_path == "-":
         text = sys.stdin.read()
     else:
-        with open(file_path) as f:
-            text = f.read()
+        text = Path(file_path).read_text()
 
-    text = text.strip()
-    if not text:
+    if not text or text.isspace():
         return [], None
 
-    if file_path and file_path.endswith(".csv"):
-        return read_csv_input(text), None
-
     try:
-        data = json.loads(text)
+        data = _json_loads(text)
     except json.JSONDecodeError:
-        return read_csv_input(text), None
+        return read_csv_input(text.strip()), None
 
     if isinstance(data, list):
         return data, None
@@ -191,39 +246,197 @@ def build_criteria(
 # ---------------------------------------------------------------------------
 
 
-def is_dominated(
-    a: dict[str, Any], b: dict[str, Any], criteria: list[dict[str, Any]]
-) -> bool:
-    """True if b dominates a (b >= a on all criteria, b > a on at least one)."""
+@dataclass
+class AnalysisContext:
+    """Column-oriented (SoA) view of the configs, shared across pipeline stages."""
+
+    configs: list[dict[str, Any]]
+    columns: dict[str, list[Any]] = field(default_factory=dict)
+    orders: dict[tuple[str, bool], list[int]] = field(default_factory=dict)
+    labels: dict[str, list[Any]] = field(default_factory=dict)
+    matrices: dict[tuple[tuple[str, bool], ...], list[tuple[Any, ...]]] = field(
+        default_factory=dict
+    )
+
+    def column(self, name: str) -> list[Any]:
+        """Values of one field across all configs (missing -> 0), built once."""
+        col = self.columns.get(name)
+        if col is None:
+            col = self.columns[name] = [cfg.get(name, 0) for cfg in self.configs]
+        return col
+
+    def names(self, name_field: str) -> list[Any]:
+        """Display name per config (``#i`` when the field is missing), built once."""
+        names = self.labels.get(name_field)
+        if names is None:
+            names = self.labels[name_field] = [
+                cfg.get(name_field, f"#{i}") for i, cfg in enumerate(self.configs)
+            ]
+        return names
+
+    def order(self, name: str, *, descending: bool = False) -> list[int]:
+        """Config indices stably sorted by one field, built once per direction."""
+        key = (name, descending)
+        idx = self.orders.get(key)
+        if idx is None:
+            col = self.column(name)
+            idx = self.orders[key] = sorted(
+                range(len(col)), key=col.__getitem__, reverse=descending
+            )
+        return idx
+
+
+def _criteria_tuple(
+    criteria: list[dict[str, Any]],
+) -> tuple[tuple[str, int, float], ...]:
+    """(name, sign, weight) per criterion; sign is +1 to maximize, -1 to minimize."""
+    return tuple(
+        (c["name"], 1 if c["direction"] == "maximize" else -1, c.get("weight", 1.0))
+        for c in criteria
+    )
+
+
+def _config_values(
+    ctx: AnalysisContext, crit: tuple[tuple[str, int, float], ...]
+) -> list[tuple[Any, ...]]:
+    """Raw criterion values per config, in criteria order."""
+    if not crit:
+        return [() for _ in ctx.configs]
+    return list(zip(*(ctx.column(name) for name, _, _ in crit), strict=True))
+
+
+def _configs_to_matrix(
+    ctx: AnalysisContext, criteria: list[dict[str, Any]]
+) -> list[tuple[Any, ...]]:
+    """Criterion values per config, sign-flipped so larger is always better.
+
+    Built once per criteria set and shared by the front and dominator passes.
+    Values keep their own types: the passes only compare them, and in CPython
+    narrowing to ints or ranks makes comparisons no faster.
+    """
+    key = tuple((c["name"], c["direction"] == "maximize") for c in criteria)
+    matrix = ctx.matrices.get(key)
+    if matrix is None:
+        columns = [
+            ctx.column(name) if maximize else [-v for v in ctx.column(name)]
+            for name, maximize in key
+        ]
+        matrix = ctx.matrices[key] = (
+            list(zip(*columns, strict=True)) if columns else [() for _ in ctx.configs]
+        )
+    return matrix
+
+
+def _dominates(a: tuple[Any, ...], b: tuple[Any, ...]) -> bool:
+    """True if row a dominates row b (both sign-normalized)."""
     any_strictly_better = False
-    for c in criteria:
-        va = a.get(c["name"], 0)
-        vb = b.get(c["name"], 0)
-        if c["direction"] == "maximize":
-            if vb < va:
-                return False
-            if vb > va:
-                any_strictly_better = True
-        else:
-            if vb > va:
-                return False
-            if vb < va:
-                any_strictly_better = True
+    for va, vb in zip(a, b, strict=True):
+        if va < vb:
+            return False
+        if va > vb:
+            any_strictly_better = True
     return any_strictly_better
 
 
+# Unrolled _dominates for the common small arities. Same comparisons in the
+# same order, so incomparable values (NaN) behave exactly like the loop.
+def _dominates_1(a: tuple[Any, ...], b: tuple[Any, ...]) -> bool:
+    return bool(a[0] > b[0])
+
+
+def _dominates_2(a: tuple[Any, ...], b: tuple[Any, ...]) -> bool:
+    (a0, a1), (b0, b1) = a, b
+    return not (a0 < b0 or a1 < b1) and (a0 > b0 or a1 > b1)
+
+
+def _dominates_3(a: tuple[Any, ...], b: tuple[Any, ...]) -> bool:
+    (a0, a1, a2), (b0, b1, b2) = a, b
+    return not (a0 < b0 or a1 < b1 or a2 < b2) and (a0 > b0 or a1 > b1 or a2 > b2)
+
+
+def _dominates_4(a: tuple[Any, ...], b: tuple[Any, ...]) -> bool:
+    (a0, a1, a2, a3), (b0, b1, b2, b3) = a, b
+    return not (a0 < b0 or a1 < b1 or a2 < b2 or a3 < b3) and (
+        a0 > b0 or a1 > b1 or a2 > b2 or a3 > b3
+    )
+
+
+_DOMINATES_BY_ARITY = {
+    1: _dominates_1,
+    2: _dominates_2,
+    3: _dominates_3,
+    4: _dominates_4,
+}
+
+
+def _dominates_for(k: int) -> Callable[[tuple[Any, ...], tuple[Any, ...]], bool]:
+    """Dominance test specialised for rows of k criteria."""
+    return _DOMINATES_BY_ARITY.get(k, _dominates)
+
+
+def _pareto_mask(matrix: list[tuple[Any, ...]]) -> list[bool]:
+    """Dominated flag per row, via a sort-based sweep (BNL / Kung).
+
+    Rows are visited in descending lexicographic order: a dominator is always
+    lexicographically greater than what it dominates, so every row only has to
+    be checked against the front found so far. For two criteria the front
+    collapses to a running best on the second axis. NaN compares false both
+    ways and leaves no usable order, so such inputs get the pairwise scan.
+    """
+    if any(v != v for row in matrix for v in row):  # noqa: PLR0124
+        dominates = _dominates_for(len(matrix[0]))
+        return [any(dominates(other, row) for other in matrix) for row in matrix]
+
+    n = len(matrix)
+    dominated = [False] * n
+    order = sorted(range(n), key=matrix.__getitem__, reverse=True)
+
+    if matrix and len(matrix[0]) == 2:
+        best_x = best_y = None
+        for i in order:
+            x, y = matrix[i]
+            if best_y is None or y > best_y:
+                best_x, best_y = x, y
+            elif y < best_y or x < best_x:
+                dominated[i] = True
+        return dominated
+
+    dominates = _dominates_for(len(matrix[0]) if matrix else 0)
+    window: list[tuple[Any, ...]] = []
+    for i in order:
+        row = matrix[i]
+        for w, other in enumerate(window):
+            if dominates(other, row):
+                dominated[i] = True
+                # A row that dominates once tends to again: bring it forward
+                if w:
+                    window[w], window[0] = window[0], other
+                break
+        else:
+            window.append(row)
+    return dominated
+
+
 def compute_pareto_front(
-    configs: list[dict[str, Any]], criteria: list[dict[str, Any]]
+    configs: list[dict[str, Any]],
+    criteria: list[dict[str, Any]],
+    *,
+    ctx: AnalysisContext | None = None,
 ) -> list[int]:
     """Indices of non-dominated items."""
-    n = len(configs)
-    front: list[int] = []
-    for i in range(n):
-        if not any(
-            j != i and is_dominated(configs[i], configs[j], criteria) for j in range(n)
-        ):
-            front.append(i)
-    return front
+    ctx = ctx or AnalysisContext(configs)
+    matrix = _configs_to_matrix(ctx, criteria)
+    # Identical rows never dominate each other: run the mask on distinct rows
+    groups: dict[tuple[Any, ...], list[int]] = {}
+    for i, row in enumerate(matrix):
+        groups.setdefault(row, []).append(i)
+    mask = _pareto_mask(list(groups))
+    return sorted(
+        i
+        for members, dominated in zip(groups.values(), mask, strict=True)
+        if not dominated
+        for i in members
+    )
 
 
 def compute_dominated(
@@ -231,30 +444,39 @@ def compute_dominated(
     criteria: list[dict[str, Any]],
     front: list[int],
     name_field: str,
+    *,
+    ctx: AnalysisContext | None = None,
 ) -> list[dict[str, Any]]:
     """For each dominated item, find dominators with reasons."""
+    ctx = ctx or AnalysisContext(configs)
+    names = ctx.names(name_field)
+    crit = _criteria_tuple(criteria)
+    values = _config_values(ctx, crit)
+    matrix = _configs_to_matrix(ctx, criteria)
+    dominates = _dominates_for(len(crit))
     front_set = set(front)
+    # The front rows are scanned once per dominated item: keep them in one
+    # compact list rather than indexing back into the full matrix each time
+    front_rows = [(j, matrix[j]) for j in front]
     result: list[dict[str, Any]] = []
 
     for i in range(len(configs)):
         if i in front_set:
             continue
+        row_i, vals_i = matrix[i], values[i]
         dominators: list[dict[str, Any]] = []
-        for j in front:
-            if not is_dominated(configs[i], configs[j], criteria):
+        for j, row_j in front_rows:
+            if not dominates(row_j, row_i):
                 continue
-            advantages = []
-            for c in criteria:
-                vi = configs[i].get(c["name"], 0)
-                vj = configs[j].get(c["name"], 0)
-                if (c["direction"] == "maximize" and vj > vi) or (
-                    c["direction"] == "minimize" and vj < vi
-                ):
-                    advantages.append(f"{c['name']}: {vi}->{vj}")
+            advantages = [
+                f"{name}: {vi}->{vj}"
+                for (name, sign, _), vi, vj in zip(crit, vals_i, values[j], strict=True)
+                if sign * (vj - vi) > 0
+            ]
             dominators.append(
                 {
                     "index": j,
-                    "name": configs[j].get(name_field, f"#{j}"),
+                    "name": names[j],
                     "advantages": advantages,
                 }
             )
@@ -263,8 +485,9 @@ def compute_dominated(
         result.append(
             {
                 "index": i,
-                "name": configs[i].get(name_field, f"#{i}"),
+                "name": names[i],
                 "dominated_by": dominators,
+                "dominated_by_names": [d["name"] for d in dominators],
             }
         )
     return result
@@ -276,42 +499,53 @@ def compute_dominated(
 
 
 def _normalize_value(
-    value: float, min_val: float, max_val: float, direction: str
+    value: float, min_val: float, max_val: float, invert: bool
 ) -> float:
-    """Normalize to 0-1 range. For minimize, invert so higher = better."""
+    """Normalize to 0-1 range. Inverted for minimize, so higher = better."""
     if max_val == min_val:
         return 0.5
     norm = (value - min_val) / (max_val - min_val)
-    if direction == "minimize":
+    if invert:
         norm = 1.0 - norm
     return norm
 
 
+def _scoring_criteria(
+    criteria: list[dict[str, Any]], min_max: dict[str, tuple[float, float]]
+) -> tuple[tuple[str, float, float, bool, float], ...]:
+    """(name, min, max, invert, weight) per criterion, resolved once per stage."""
+    return tuple(
+        (
+            c["name"],
+            *min_max[c["name"]],
+            c["direction"] == "minimize",
+            c.get("weight", 1.0),
+        )
+        for c in criteria
+    )
+
+
 def _compute_composite_score(
     config: dict[str, Any],
-    criteria: list[dict[str, Any]],
-    min_max: dict[str, tuple[float, float]],
+    scoring: tuple[tuple[str, float, float, bool, float], ...],
 ) -> float:
     """Weighted composite score (0-1) using normalized criterion values."""
     total_weight = 0.0
     weighted_sum = 0.0
-    for c in criteria:
-        mn, mx = min_max[c["name"]]
-        val = config.get(c["name"], 0)
-        norm = _normalize_value(val, mn, mx, c["direction"])
-        w = c.get("weight", 1.0)
+    for name, mn, mx, invert, w in scoring:
+        norm = _normalize_value(config.get(name, 0), mn, mx, invert)
         weighted_sum += w * norm
         total_weight += w
     return round(weighted_sum / total_weight, 4) if total_weight > 0 else 0.0
 
 
 def _build_min_max(
-    configs: list[dict[str, Any]], criteria: list[dict[str, Any]]
+    ctx: AnalysisContext, criteria: list[dict[str, Any]]
 ) -> dict[str, tuple[float, float]]:
     """Compute min/max per criterion across all configs."""
     mm: dict[str, tuple[float, float]] = {}
     for c in criteria:
-        vals = [cfg.get(c["name"], 0) for cfg in configs]
+        vals = ctx.column(c["name"])
         mm[c["name"]] = (min(vals), max(vals))
     return mm
 
@@ -321,24 +555,32 @@ def _build_min_max(
 # ---------------------------------------------------------------------------
 
 
-def _metric_ratio(v_from: float, v_to: float, direction: str) -> float:
-    """Improvement ratio respecting direction."""
-    if direction == "maximize":
+def _metric_ratio(v_from: float, v_to: float, sign: int) -> float:
+    """Improvement ratio respecting direction (sign +1 maximize, -1 minimize)."""
+    if sign > 0:
         return v_to / v_from if v_from != 0 else (float("inf") if v_to > 0 else 1.0)
     return v_from / v_to if v_to != 0 else (float("inf") if v_from > 0 else 1.0)
 
 
-def compute_marginal_gains(
-    cfg_from: dict[str, Any],
-    cfg_to: dict[str, Any],
-    criteria: list[dict[str, Any]],
+def _gain_criteria(
+    crit: tuple[tuple[str, int, float], ...], sort_field: str
+) -> tuple[tuple[int, int, float], ...]:
+    """(value index, sign, weight) of the criteria scored against the sort axis."""
+    return tuple(
+        (k, sign, weight)
+        for k, (name, sign, weight) in enumerate(crit)
+        if name != sort_field
+    )
+
+
+def _marginal_gains_t(
+    a: tuple[Any, ...],
+    b: tuple[Any, ...],
+    crit: tuple[tuple[str, int, float], ...],
 ) -> list[dict[str, Any]]:
-    """Per-criterion gain ratios between two configs."""
+    """Per-criterion gain ratios between two value tuples."""
     gains: list[dict[str, Any]] = []
-    for c in criteria:
-        name = c["name"]
-        v_from = cfg_from.get(name, 0)
-        v_to = cfg_to.get(name, 0)
+    for (name, _, _), v_from, v_to in zip(crit, a, b, strict=True):
         ratio = v_to / v_from if v_from != 0 else (float("inf") if v_to != 0 else 1.0)
         gains.append(
             {"field": name, "from": v_from, "to": v_to, "ratio": round(ratio, 3)}
@@ -346,23 +588,30 @@ def compute_marginal_gains(
     return gains
 
 
-def compute_gain_score(
+def compute_marginal_gains(
     cfg_from: dict[str, Any],
     cfg_to: dict[str, Any],
     criteria: list[dict[str, Any]],
-    sort_field: str,
-    sort_direction: str,
+) -> list[dict[str, Any]]:
+    """Per-criterion gain ratios between two configs."""
+    crit = _criteria_tuple(criteria)
+    a, b = _config_values(AnalysisContext([cfg_from, cfg_to]), crit)
+    return _marginal_gains_t(a, b, crit)
+
+
+def _gain_score_raw(
+    a: tuple[Any, ...],
+    b: tuple[Any, ...],
+    s_from: float,
+    s_to: float,
+    gain_crit: tuple[tuple[int, int, float], ...],
+    ascending: bool,
 ) -> float:
-    """Weighted performance gain / sort-axis change ratio.
-
-    > 1.0 means proportionally more improvement than sort-axis increase.
-    """
-    s_from = cfg_from.get(sort_field, 0)
-    s_to = cfg_to.get(sort_field, 0)
+    """Unrounded gain score over pre-extracted value tuples and sort values."""
     if s_from == 0:
         return 0.0
 
-    if sort_direction == "asc":
+    if ascending:
         if s_to <= s_from:
             return 0.0
         sort_ratio = s_to / s_from
@@ -373,18 +622,135 @@ def compute_gain_score(
 
     weighted_gain = 0.0
     total_weight = 0.0
-    for c in criteria:
-        if c["name"] == sort_field:
-            continue
-        v_from = cfg_from.get(c["name"], 0)
-        v_to = cfg_to.get(c["name"], 0)
-        weighted_gain += c["weight"] * _metric_ratio(v_from, v_to, c["direction"])
-        total_weight += c["weight"]
+    for k, sign, weight in gain_crit:
+        weighted_gain += weight * _metric_ratio(a[k], b[k], sign)
+        total_weight += weight
+
+    if total_weight > 0:
+        weighted_gain /= total_weight
+
+    return weighted_gain / sort_ratio
 
+
+def _gain_score_t(
+    a: tuple[Any, ...],
+    b: tuple[Any, ...],
+    s_from: float,
+    s_to: float,
+    gain_crit: tuple[tuple[int, int, float], ...],
+    ascending: bool,
+) -> float:
+    """compute_gain_score over pre-extracted value tuples and sort values."""
+    return float(round(_gain_score_raw(a, b, s_from, s_to, gain_crit, ascending), 4))
+
+
+def _pair_stats(
+    a: tuple[Any, ...],
+    b: tuple[Any, ...],
+    s_from: float,
+    s_to: float,
+    crit: tuple[tuple[str, int, float], ...],
+    gain_crit: tuple[tuple[int, int, float], ...],
+    ascending: bool,
+) -> tuple[list[dict[str, Any]], float]:
+    """Marginal gains and gain score of one pair from a single criteria scan.
+
+    Same results as _marginal_gains_t and _gain_score_t on the pair.
+    """
+    scored = {k: (sign, weight) for k, sign, weight in gain_crit}
+    gains: list[dict[str, Any]] = []
+    weighted_gain = 0.0
+    total_weight = 0.0
+    for k, ((name, _, _), v_from, v_to) in enumerate(zip(crit, a, b, strict=True)):
+        ratio = v_to / v_from if v_from != 0 else (float("inf") if v_to != 0 else 1.0)
+        gains.append(
+            {"field": name, "from": v_from, "to": v_to, "ratio": round(ratio, 3)}
+        )
+        if k in scored:
+            sign, weight = scored[k]
+            weighted_gain += weight * _metric_ratio(v_from, v_to, sign)
+            total_weight += weight
+
+    if s_from == 0 or (s_to <= s_from if ascending else s_to >= s_from):
+        return gains, 0.0
+    sort_ratio = s_to / s_from if ascending else s_from / s_to
     if total_weight > 0:
         weighted_gain /= total_weight
+    return gains, float(round(weighted_gain / sort_ratio, 4))
 
-    return float(round(weighted_gain / sort_ratio, 4))
+
+def compute_gain_score(
+    cfg_from: dict[str, Any],
+    cfg_to: dict[str, Any],
+    criteria: list[dict[str, Any]],
+    sort_field: str,
+    sort_direction: str,
+) -> float:
+    """Weighted performance gain / sort-axis change ratio.
+
+    > 1.0 means proportionally more improvement than sort-axis increase.
+    """
+    crit = _criteria_tuple(criteria)
+    a, b = _config_values(AnalysisContext([cfg_from, cfg_to]), crit)
+    return _gain_score_t(
+        a,
+        b,
+        cfg_from.get(sort_field, 0),
+        cfg_to.get(sort_field, 0),
+        _gain_criteria(crit, sort_field),
+        sort_direction == "asc",
+    )
+
+
+# Below this many items, worker start-up costs more than the search itself
+_PARALLEL_MIN_ITEMS = 1000
+
+
+@dataclass(frozen=True)
+class _PredecessorSearch:
+    """Inputs of the sweet-spot predecessor search, picklable for workers."""
+
+    values: list[tuple[Any, ...]]
+    order: list[int]
+    sort_vals: list[Any]
+    gain_crit: tuple[tuple[int, int, float], ...]
+    ascending: bool
+    min_gap: float
+
+    def best(self, positions: range) -> list[tuple[int, float, int]]:
+        """(pos, best gain score, best predecessor index) per sorted position."""
+        values, order, sort_vals = self.values, self.order, self.sort_vals
+        found: list[tuple[int, float, int]] = []
+        for pos in positions:
+            vals, s_to = values[order[pos]], sort_vals[pos]
+            best_gain = 0.0
+            best_from = order[0]
+
+            # The gap to s_to only shrinks towards pos, so the predecessors
+            # closer than min_gap form a tail that can be cut off up front.
+            cut = pos
+            while cut > 0 and abs(s_to - sort_vals[cut - 1]) < self.min_gap:
+                cut -= 1
+
+            for prev_pos in range(cut):
+                prev_idx = order[prev_pos]
+                raw = _gain_score_raw(
+                    values[prev_idx],
+                    vals,
+                    sort_vals[prev_pos],
+                    s_to,
+                    self.gain_crit,
+                    self.ascending,
+                )
+                # round() is monotone, so only a raw score above best can beat it
+                if raw <= best_gain:
+                    continue
+                score = float(round(raw, 4))
+                if score > best_gain:
+                    best_gain = score
+                    best_from = prev_idx
+            found.append((pos, best_gain, best_from))
+        return found
 
 
 def detect_sweet_spots(
@@ -394,138 +760,221 @@ def detect_sweet_spots(
     sort_direction: str,
     threshold: float,
     name_field: str,
+    *,
+    ctx: AnalysisContext | None = None,
+    jobs: int = 1,
 ) -> list[dict[str, Any]]:
-    """Items where gain_score is disproportionately high along the sort axis."""
-    reverse = sort_direction == "desc"
-    sorted_indices = sorted(
-        range(len(configs)),
-        key=lambda i: configs[i].get(sort_field, 0),
-        reverse=reverse,
-    )
+    """Items where gain_score is disproportionately high along the sort axis.
 
-    sort_vals = [configs[i].get(sort_field, 0) for i in sorted_indices]
+    With jobs > 1, large inputs search predecessors in worker processes.
+    """
+    ctx = ctx or AnalysisContext(configs)
+    names = ctx.names(name_field)
+    crit = _criteria_tuple(criteria)
+    values = _config_values(ctx, crit)
+    gain_crit = _gain_criteria(crit, sort_field)
+    ascending = sort_direction == "asc"
+    sort_col = ctx.column(sort_field)
+
+    sorted_indices = ctx.order(sort_field, descending=sort_direction == "desc")
+
+    sort_vals = [sort_col[i] for i in sorted_indices]
     if len(sort_vals) < 2:
         return []
     sort_range = max(sort_vals) - min(sort_vals)
     min_gap = sort_range * 0.03 if sort_range > 0 else 0
 
-    sweet_spots: list[dict[str, Any]] = []
+    search = _PredecessorSearch(
+        values, sorted_indices, sort_vals, gain_crit, ascending, min_gap
+    )
+    n = len(sorted_indices)
+    if jobs > 1 and n >= _PARALLEL_MIN_ITEMS:
+        # Work grows with pos, so positions are dealt out round-robin
+        chunks = [range(1 + r, n, jobs * 4) for r in range(jobs * 4)]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            found = sorted(itertools.chain.from_iterable(pool.map(search.best, chunks)))
+    else:
+        found = search.best(range(1, n))
 
-    for pos in range(1, len(sorted_indices)):
+    sweet_spots: list[dict[str, Any]] = []
+    for pos, best_gain, best_from in found:
         idx = sorted_indices[pos]
-        cfg = configs[idx]
-        best_gain = 0.0
-        best_from = sorted_indices[0]
-
-        for prev_pos in range(pos):
-            prev_idx = sorted_indices[prev_pos]
-            prev_cfg = configs[prev_idx]
-            gap = abs(cfg.get(sort_field, 0) - prev_cfg.get(sort_field, 0))
-            if gap < min_gap:
-                continue
-            score = compute_gain_score(
-                prev_cfg, cfg, criteria, sort_field, sort_direction
-            )
-            if score > best_gain:
-                best_gain = score
-                best_from = prev_idx
-
+        vals, s_to = values[idx], sort_vals[pos]
         if best_gain >= threshold:
-            gains = compute_marginal_gains(configs[best_from], cfg, criteria)
-            top_gains = sorted(gains, key=lambda g: g["ratio"], reverse=True)[:3]
+            gains = _marginal_gains_t(values[best_from], vals, crit)
+            top_gains = heapq.nlargest(3, gains, key=operator.itemgetter("ratio"))
             reason_parts = [
                 f"{g['field']}:{g['ratio']:.1f}x" for g in top_gains if g["ratio"] > 1.1
             ]
             sweet_spots.append(
                 {
                     "config_index": idx,
-                    "name": cfg.get(name_field, f"#{idx}"),
-                    "sort_value": cfg.get(sort_field, 0),
+                    "name": names[idx],
+                    "sort_value": s_to,
                     "gain_score": best_gain,
                     "compared_to_index": best_from,
-                    "compared_to_name": configs[best_from].get(
-                        name_field, f"#{best_from}"
-                    ),
+                    "compared_to_name": names[best_from],
                     "reason": f"gain_score {best_gain:.2f} — {', '.join(reason_parts)}",
                     "marginal_gains": gains,
                 }
             )
 
-    sweet_spots.sort(key=lambda s: s["gain_score"], reverse=True)
+    sweet_spots.sort(key=operator.itemgetter("gain_score"), reverse=True)
     return sweet_spots
 
 
+def _near_on_axis(
+    sort_col: list[Any], tolerance: float
+) -> Callable[[int], Iterable[int]]:
+    """Neighbour lookup: indices j within relative tolerance of sort_col[i].
+
+    Neighbours are yielded in index order. For tolerance < 1 the relative
+    test implies |vi - vj| <= tolerance * (|vi| + eps) / (1 - tolerance), so
+    candidates come from a bisected window of the sorted column rather than
+    a scan of every item.
+    """
+    eps = 1e-9
+
+    def close(vi: float, vj: float) -> bool:
+        return not abs(vi - vj) / max(abs(vi), abs(vj), eps) > tolerance
+
+    everyone = range(len(sort_col))
+    if not 0 <= tolerance < 1 or not all(map(math.isfinite, sort_col)):
+
+        def scan(i: int) -> Iterable[int]:
+            vi = sort_col[i]
+            return (j for j in everyone if close(vi, sort_col[j]))
+
+        return scan
+
+    order = sorted(everyone, key=sort_col.__getitem__)
+    ordered = [sort_col[j] for j in order]
+    slack = 1 + 1e-6
+
+    def window(i: int) -> Iterable[int]:
+        vi = sort_col[i]
+        reach = tolerance * (abs(vi) + eps) / (1 - tolerance) * slack
+        lo = bisect.bisect_left(ordered, vi - reach)
+        hi = bisect.bisect_right(ordered, vi + reach)
+        return (j for j in sorted(order[lo:hi]) if close(vi, sort_col[j]))
+
+    return window
+
+
+def _distinct_rows(rows: list[tuple[Any, ...]]) -> tuple[list[int], list[int]]:
+    """(lowest index of each distinct row, group number of every row).
+
+    Value types are part of the key, so 1 and 1.0 never share a group.
+    """
+    seen: dict[tuple[Any, ...], int] = {}
+    reps: list[int] = []
+    group_of: list[int] = []
+    for i, row in enumerate(rows):
+        group = seen.setdefault((row, tuple(map(type, row))), len(reps))
+        if group == len(reps):
+            reps.append(i)
+        group_of.append(group)
+    return reps, group_of
+
+
+def _trap_compare(
+    vals_i: tuple[Any, ...],
+    vals_j: tuple[Any, ...],
+    abs_i: tuple[Any, ...],
+    abs_j: tuple[Any, ...],
+    compare: tuple[tuple[int, str, int], ...],
+) -> tuple[int, int, list[str]]:
+    """Criteria where j beats i by >10%, where i beats j, and j's wins."""
+    j_better = 0
+    i_better = 0
+    details: list[str] = []
+    for k, name, sign in compare:
+        ci = vals_i[k]
+        cj = vals_j[k]
+        ref = max(abs_i[k], abs_j[k], 1e-9)
+        if sign * (cj - ci) / ref > 0.1:
+            j_better += 1
+            details.append(f"{name}: {ci}->{cj}")
+        elif sign * (ci - cj) / ref > 0.1:
+            i_better += 1
+    return j_better, i_better, details
+
+
 def detect_traps(
     configs: list[dict[str, Any]],
     criteria: list[dict[str, Any]],
     sort_field: str | None,
     tolerance: float,
     name_field: str,
+    *,
+    ctx: AnalysisContext | None = None,
 ) -> list[dict[str, Any]]:
     """Trap items: close on sort axis but strictly worse on other criteria.
 
     Without sort_field: pure domination only.
     """
-    traps: list[dict[str, Any]] = []
-    found: set[int] = set()
-
-    for i in range(len(configs)):
-        if i in found:
-            continue
-        for j in range(len(configs)):
-            if i == j:
+    ctx = ctx or AnalysisContext(configs)
+    names = ctx.names(name_field)
+    crit = _criteria_tuple(criteria)
+    values = _config_values(ctx, crit)
+    compare = tuple(
+        (k, name, sign)
+        for k, (name, sign, _) in enumerate(crit)
+        if not sort_field or name != sort_field
+    )
+    sort_col = ctx.column(sort_field) if sort_field else []
+    near = _near_on_axis(sort_col, tolerance) if sort_field else None
+    abs_values = [tuple(abs(v) for v in row) for row in values]
+    everyone = range(len(configs))
+
+    # Identical rows get identical verdicts, so search once per distinct row
+    reps, group_of = _distinct_rows(
+        [(*row, s) for row, s in zip(values, sort_col, strict=True)]
+        if sort_field
+        else values
+    )
+    is_rep = [False] * len(configs)
+    for i in reps:
+        is_rep[i] = True
+
+    # Groups are keyed by their lowest index, so the first distinct row that
+    # traps i is also the first item in index order that does.
+    trapped_by: list[int | None] = []
+    for i in reps:
+        hit: int | None = None
+        for j in near(i) if near else everyone:
+            if i == j or not is_rep[j]:
                 continue
-
-            # Proximity check on sort axis
-            if sort_field:
-                vi_s = configs[i].get(sort_field, 0)
-                vj_s = configs[j].get(sort_field, 0)
-                ref = max(abs(vi_s), abs(vj_s), 1e-9)
-                if abs(vi_s - vj_s) / ref > tolerance:
-                    continue
-
-            compare_criteria = (
-                [c for c in criteria if c["name"] != sort_field]
-                if sort_field
-                else criteria
+            j_better, i_better, _ = _trap_compare(
+                values[i], values[j], abs_values[i], abs_values[j], compare
             )
-
-            j_better = 0
-            i_better = 0
-            details: list[str] = []
-            for c in compare_criteria:
-                ci = configs[i].get(c["name"], 0)
-                cj = configs[j].get(c["name"], 0)
-                ref = max(abs(ci), abs(cj), 1e-9)
-                if c["direction"] == "maximize":
-                    if (cj - ci) / ref > 0.1:
-                        j_better += 1
-                        details.append(f"{c['name']}: {ci}->{cj}")
-                    elif (ci - cj) / ref > 0.1:
-                        i_better += 1
-                elif (ci - cj) / ref > 0.1:
-                    j_better += 1
-                    details.append(f"{c['name']}: {ci}->{cj}")
-                elif (cj - ci) / ref > 0.1:
-                    i_better += 1
-
             if j_better >= 2 and i_better == 0:
-                sort_info = ""
-                if sort_field:
-                    vi_s = configs[i].get(sort_field, 0)
-                    vj_s = configs[j].get(sort_field, 0)
-                    sort_info = f" ({sort_field} diff: {abs(vi_s - vj_s):.4g})"
-                traps.append(
-                    {
-                        "index": i,
-                        "name": configs[i].get(name_field, f"#{i}"),
-                        "dominated_by_index": j,
-                        "dominated_by_name": configs[j].get(name_field, f"#{j}"),
-                        "reason": f"Similar{sort_info}, but worse: {'; '.join(details)}",
-                    }
-                )
-                found.add(i)
+                hit = j
                 break
+        trapped_by.append(hit)
+
+    traps: list[dict[str, Any]] = []
+    for i in everyone:
+        by = trapped_by[group_of[i]]
+        if by is None:
+            continue
+        j = by
+        _, _, details = _trap_compare(
+            values[i], values[j], abs_values[i], abs_values[j], compare
+        )
+        sort_info = ""
+        if sort_field:
+            sort_diff = abs(sort_col[i] - sort_col[j])
+            sort_info = f" ({sort_field} diff: {sort_diff:.4g})"
+        traps.append(
+            {
+                "index": i,
+                "name": names[i],
+                "dominated_by_index": j,
+                "dominated_by_name": names[j],
+                "reason": f"Similar{sort_info}, but worse: {'; '.join(details)}",
+            }
+        )
 
     return traps
 
@@ -536,16 +985,21 @@ def compute_tier_transitions(
     sort_field: str,
     sort_direction: str,
     name_field: str,
+    *,
+    ctx: AnalysisContext | None = None,
 ) -> list[dict[str, Any]]:
     """Sequential transitions along sort axis, finding disproportionate jumps."""
-    reverse = sort_direction == "desc"
-    sorted_indices = sorted(
-        range(len(configs)),
-        key=lambda i: configs[i].get(sort_field, 0),
-        reverse=reverse,
-    )
+    ctx = ctx or AnalysisContext(configs)
+    names = ctx.names(name_field)
+    crit = _criteria_tuple(criteria)
+    values = _config_values(ctx, crit)
+    gain_crit = _gain_criteria(crit, sort_field)
+    ascending = sort_direction == "asc"
+    sort_col = ctx.column(sort_field)
 
-    sort_vals = [configs[i].get(sort_field, 0) for i in sorted_indices]
+    sorted_indices = ctx.order(sort_field, descending=sort_direction == "desc")
+
+    sort_vals = [sort_col[i] for i in sorted_indices]
     if len(sort_vals) < 2:
         return []
     sort_range = max(sort_vals) - min(sort_vals)
@@ -559,7 +1013,7 @@ def compute_tier_transitions(
     seen_buckets: set[int] = set()
     representative: list[int] = []
     for idx in sorted_indices:
-        val = configs[idx].get(sort_field, 0)
+        val = sort_col[idx]
         bucket = int(val / bucket_size) if bucket_size > 0 else 0
         if bucket not in seen_buckets:
             seen_buckets.add(bucket)
@@ -571,28 +1025,27 @@ def compute_tier_transitions(
     for pos in range(1, len(representative)):
         from_idx = representative[pos - 1]
         to_idx = representative[pos]
-        s_from = configs[from_idx].get(sort_field, 0)
-        s_to = configs[to_idx].get(sort_field, 0)
+        s_from = sort_col[from_idx]
+        s_to = sort_col[to_idx]
         delta = abs(s_to - s_from)
         if delta < min_delta:
             continue
 
         sort_ratio = s_to / s_from if s_from != 0 else 0.0
-        gains = compute_marginal_gains(configs[from_idx], configs[to_idx], criteria)
+        gains, score = _pair_stats(
+            values[from_idx], values[to_idx], s_from, s_to, crit, gain_crit, ascending
+        )
         key_jumps = [
             f"{g['field']}:{g['ratio']:.1f}x"
             for g in gains
             if g["ratio"] > 1.2 or (0 < g["ratio"] < 0.83)
         ]
-        score = compute_gain_score(
-            configs[from_idx], configs[to_idx], criteria, sort_field, sort_direction
-        )
         transitions.append(
             {
                 "from_idx": from_idx,
                 "to_idx": to_idx,
-                "from_name": configs[from_idx].get(name_field, f"#{from_idx}"),
-                "to_name": configs[to_idx].get(name_field, f"#{to_idx}"),
+                "from_name": names[from_idx],
+                "to_name": names[to_idx],
                 "delta": round(delta, 4),
                 "sort_ratio": round(sort_ratio, 3),
                 "key_jumps": key_jumps,
@@ -613,58 +1066,59 @@ def compute_front_tradeoffs(
     criteria: list[dict[str, Any]],
     front: list[int],
     name_field: str,
+    *,
+    ctx: AnalysisContext | None = None,
 ) -> list[dict[str, Any]]:
     """Per-item strengths/weaknesses + pairwise trade-off summary for front items."""
     if len(front) < 2:
         return []
 
-    min_max = _build_min_max(configs, criteria)
+    ctx = ctx or AnalysisContext(configs)
+    names = ctx.names(name_field)
+    scoring = _scoring_criteria(criteria, _build_min_max(ctx, criteria))
     items: list[dict[str, Any]] = []
 
     for idx in front:
         cfg = configs[idx]
         strengths: list[str] = []
         weaknesses: list[str] = []
-        for c in criteria:
-            mn, mx = min_max[c["name"]]
-            norm = _normalize_value(cfg.get(c["name"], 0), mn, mx, c["direction"])
+        for name, mn, mx, invert, _ in scoring:
+            norm = _normalize_value(cfg.get(name, 0), mn, mx, invert)
             if norm >= 0.8:
-                strengths.append(c["name"])
+                strengths.append(name)
             elif norm <= 0.2:
-                weaknesses.append(c["name"])
+                weaknesses.append(name)
         items.append(
             {
                 "index": idx,
-                "name": cfg.get(name_field, f"#{idx}"),
+                "name": names[idx],
                 "strengths": strengths,
                 "weaknesses": weaknesses,
             }
         )
 
     # Pairwise trade-offs
+    crit = _criteria_tuple(criteria)
+    values = _config_values(ctx, crit)
     tradeoffs: list[dict[str, Any]] = []
     for i_pos in range(len(front)):
         for j_pos in range(i_pos + 1, len(front)):
             a_idx, b_idx = front[i_pos], front[j_pos]
-            a, b = configs[a_idx], configs[b_idx]
             a_better: list[str] = []
             b_better: list[str] = []
-            for c in criteria:
-                va, vb = a.get(c["name"], 0), b.get(c["name"], 0)
-                if c["direction"] == "maximize":
-                    if va > vb:
-                        a_better.append(c["name"])
-                    elif vb > va:
-                        b_better.append(c["name"])
-                elif va < vb:
-                    a_better.append(c["name"])
-                elif vb < va:
-                    b_better.append(c["name"])
+            for (name, sign, _), va, vb in zip(
+                crit, values[a_idx], values[b_idx], strict=True
+            ):
+                diff = sign * (va - vb)
+                if diff > 0:
+                    a_better.append(name)
+                elif diff < 0:
+                    b_better.append(name)
             if a_better or b_better:
                 tradeoffs.append(
                     {
-                        "a": a.get(name_field, f"#{a_idx}"),
-                        "b": b.get(name_field, f"#{b_idx}"),
+                        "a": names[a_idx],
+                        "b": names[b_idx],
                         "a_better_at": a_better,
                         "b_better_at": b_better,
                     }
@@ -687,20 +1141,25 @@ def compute_weighted_ranking(
     configs: list[dict[str, Any]],
     criteria: list[dict[str, Any]],
     name_field: str,
+    *,
+    ctx: AnalysisContext | None = None,
 ) -> list[dict[str, Any]]:
     """Rank all items by composite score. Fallback when no sort axis."""
-    min_max = _build_min_max(configs, criteria)
+    ctx = ctx or AnalysisContext(configs)
+    names = ctx.names(name_field)
+    min_max = _build_min_max(ctx, criteria)
+    scoring = _scoring_criteria(criteria, min_max)
     ranked: list[dict[str, Any]] = []
     for i, cfg in enumerate(configs):
-        score = _compute_composite_score(cfg, criteria, min_max)
+        score = _compute_composite_score(cfg, scoring)
         ranked.append(
             {
                 "index": i,
-                "name": cfg.get(name_field, f"#{i}"),
+                "name": names[i],
                 "composite_score": score,
             }
         )
-    ranked.sort(key=lambda r: r["composite_score"], reverse=True)
+    ranked.sort(key=operator.itemgetter("composite_score"), reverse=True)
     for rank, item in enumerate(ranked, 1):
         item["rank"] = rank
     return ranked
@@ -713,9 +1172,13 @@ def compute_segment_bests(
     sort_direction: str,
     name_field: str,
     num_segments: int | None = None,
+    *,
+    ctx: AnalysisContext | None = None,
 ) -> list[dict[str, Any]]:
     """Split sort axis into equal-width segments, find best per segment."""
-    vals = [cfg.get(sort_field, 0) for cfg in configs]
+    ctx = ctx or AnalysisContext(configs)
+    names = ctx.names(name_field)
+    vals = ctx.column(sort_field)
     lo, hi = min(vals), max(vals)
     if lo == hi:
         return []
@@ -725,8 +1188,9 @@ def compute_segment_bests(
         num_segments = max(3, min(8, int(math.sqrt(n))))
 
     width = (hi - lo) / num_segments
-    min_max = _build_min_max(configs, criteria)
+    min_max = _build_min_max(ctx, criteria)
     non_sort_criteria = [c for c in criteria if c["name"] != sort_field]
+    scoring = _scoring_criteria(non_sort_criteria or criteria, min_max)
 
     segments: list[dict[str, Any]] = []
     for seg_idx in range(num_segments):
@@ -751,21 +1215,13 @@ def compute_segment_bests(
         local_front_global = [indices[li] for li in local_front_local]
 
         # Best by composite score among local front
-        best_idx = max(
-            local_front_global,
-            key=lambda i: _compute_composite_score(
-                configs[i], non_sort_criteria or criteria, min_max
-            ),
-        )
-        best_score = _compute_composite_score(
-            configs[best_idx], non_sort_criteria or criteria, min_max
-        )
+        scores = {
+            i: _compute_composite_score(configs[i], scoring) for i in local_front_global
+        }
+        best_idx = max(local_front_global, key=scores.__getitem__)
+        best_score = scores[best_idx]
 
-        alternatives = [
-            configs[i].get(name_field, f"#{i}")
-            for i in local_front_global
-            if i != best_idx
-        ]
+        alternatives = [names[i] for i in local_front_global if i != best_idx]
 
         seg_label = f"{seg_lo:.4g}-{seg_hi:.4g}"
         segments.append(
@@ -774,7 +1230,7 @@ def compute_segment_bests(
                 "range_low": round(seg_lo, 4),
                 "range_high": round(seg_hi, 4),
                 "best_index": best_idx,
-                "best": configs[best_idx].get(name_field, f"#{best_idx}"),
+                "best": names[best_idx],
                 "composite_score": best_score,
                 "alternatives": alternatives,
                 "item_count": len(indices),
@@ -798,6 +1254,7 @@ def analyze(
     threshold: float = 0.85,
     tolerance: float = 0.05,
     name_field: str = "name",
+    jobs: int = 1,
 ) -> dict[str, Any]:
     """Run full analysis pipeline.
 
@@ -811,8 +1268,10 @@ def analyze(
         if name_field not in cfg:
             cfg[name_field] = f"#{i}"
 
-    front = compute_pareto_front(configs, criteria)
-    dominated = compute_dominated(configs, criteria, front, name_field)
+    ctx = AnalysisContext(configs)
+    names = ctx.names(name_field)
+    front = compute_pareto_front(configs, criteria, ctx=ctx)
+    dominated = compute_dominated(configs, criteria, front, name_field, ctx=ctx)
 
     result: dict[str, Any] = {
         "summary": {
@@ -821,14 +1280,14 @@ def analyze(
             "pareto_ratio": round(len(front) / len(configs), 3) if configs else 0,
         },
         "pareto_front": front,
-        "pareto_front_names": [configs[i].get(name_field, f"#{i}") for i in front],
+        "pareto_front_names": [names[i] for i in front],
         "dominated": dominated,
         "criteria_used": criteria,
     }
 
     # Front trade-offs (always when front >= 2)
     if len(front) >= 2:
-        ft = compute_front_tradeoffs(configs, criteria, front, name_field)
+        ft = compute_front_tradeoffs(configs, criteria, front, name_field, ctx=ctx)
         result["front_tradeoffs"] = ft
 
     # Auto-detect sort_field
@@ -843,14 +1302,23 @@ def analyze(
 
     if sort_field:
         sweet_spots = detect_sweet_spots(
-            configs, criteria, sort_field, sort_direction, threshold, name_field
+            configs,
+            criteria,
+            sort_field,
+            sort_direction,
+            threshold,
+            name_field,
+            ctx=ctx,
+            jobs=jobs,
+        )
+        traps = detect_traps(
+            configs, criteria, sort_field, tolerance, name_field, ctx=ctx
         )
-        traps = detect_traps(configs, criteria, sort_field, tolerance, name_field)
         transitions = compute_tier_transitions(
-            configs, criteria, sort_field, sort_direction, name_field
+            configs, criteria, sort_field, sort_direction, name_field, ctx=ctx
         )
         segment_bests = compute_segment_bests(
-            configs, criteria, sort_field, sort_direction, name_field
+            configs, criteria, sort_field, sort_direction, name_field, ctx=ctx
         )
         result["summary"]["sweet_spots_count"] = len(sweet_spots)
         result["summary"]["traps_count"] = len(traps)
@@ -864,12 +1332,12 @@ def analyze(
         result["tier_transitions"] = transitions
         result["segment_bests"] = segment_bests
     else:
-        traps = detect_traps(configs, criteria, None, tolerance, name_field)
+        traps = detect_traps(configs, criteria, None, tolerance, name_field, ctx=ctx)
         if traps:
             result["summary"]["traps_count"] = len(traps)
             result["traps"] = traps
         # Weighted ranking fallback
-        ranking = compute_weighted_ranking(configs, criteria, name_field)
+        ranking = compute_weighted_ranking(configs, criteria, name_field, ctx=ctx)
         result["weighted_ranking"] = ranking
 
     return result
@@ -879,6 +1347,11 @@ def analyze(
 # Output formatting
 # ---------------------------------------------------------------------------
 
+# Markdown row templates, rendered with str.format_map in the hot loops
+_PAIRWISE_MD = "- **{a}** vs **{b}**: {a} wins on {a_at}; {b} wins on {b_at}"
+_SWEET_SPOT_MD = "**{rank}. {name}** (gain score: {gain_score:.2f})"
+_SWEET_SPOT_REASON_MD = "   vs {compared_to_name}: {reason}"
+
 
 def _col_width(values: list[str], header: str) -> int:
     return max(len(header), *(len(v) for v in values)) if values else len(header)
@@ -908,10 +1381,10 @@ def format_table(
         cols = [name_field] + [c["name"] for c in criteria]
         rows = [[str(configs[i].get(c, "")) for c in cols] for i in front]
         widths = [_col_width([r[ci] for r in rows], c) for ci, c in enumerate(cols)]
-        lines.append(" | ".join(c.ljust(w) for c, w in zip(cols, widths)))
+        row_fmt = " | ".join(f"{{:<{w}}}" for w in widths).format
+        lines.append(row_fmt(*cols))
         lines.append("-+-".join("-" * w for w in widths))
-        for row in rows:
-            lines.append(" | ".join(v.ljust(w) for v, w in zip(row, widths)))
+        lines.extend(row_fmt(*row) for row in rows)
 
     if result.get("front_tradeoffs"):
         ft = result["front_tradeoffs"][0]
@@ -965,16 +1438,16 @@ def format_table(
     if result.get("traps"):
         lines.append("")
         lines.append("== Traps ==")
-        for t in result["traps"]:
-            lines.append(
-                f"  {t['name']} <- {t['dominated_by_name']} is better: {t['reason']}"
-            )
+        lines.extend(
+            f"  {t['name']} <- {t['dominated_by_name']} is better: {t['reason']}"
+            for t in result["traps"]
+        )
 
     if result.get("dominated"):
         lines.append("")
         lines.append(f"== Dominated ({len(result['dominated'])}) ==")
         for d in result["dominated"][:10]:
-            doms = ", ".join(db["name"] for db in d["dominated_by"][:2])
+            doms = ", ".join(d["dominated_by_names"][:2])
             lines.append(f"  {d['name']} <- dominated by {doms}")
 
     return "\n".join(lines)
@@ -1008,9 +1481,8 @@ def format_markdown(
         cols = [name_field] + [c["name"] for c in criteria]
         lines.append("| " + " | ".join(cols) + " |")
         lines.append("| " + " | ".join("---" for _ in cols) + " |")
-        for i in front:
-            vals = [str(configs[i].get(c, "")) for c in cols]
-            lines.append("| " + " | ".join(vals) + " |")
+        row_fmt = ("| " + " | ".join("{}" for _ in cols) + " |").format
+        lines.extend(row_fmt(*(configs[i].get(c, "") for c in cols)) for i in front)
 
     if result.get("front_tradeoffs"):
         ft = result["front_tradeoffs"][0]
@@ -1025,23 +1497,21 @@ def format_markdown(
             lines.append(f"| {item['name']} | {s} | {w} |")
         if ft["pairwise"]:
             lines.append("")
+            render_pairwise = _PAIRWISE_MD.format_map
             for pw in ft["pairwise"][:5]:
                 a_at = ", ".join(pw["a_better_at"]) if pw["a_better_at"] else "-"
                 b_at = ", ".join(pw["b_better_at"]) if pw["b_better_at"] else "-"
-                lines.append(
-                    f"- **{pw['a']}** vs **{pw['b']}**: "
-                    f"{pw['a']} wins on {a_at}; {pw['b']} wins on {b_at}"
-                )
+                lines.append(render_pairwise({**pw, "a_at": a_at, "b_at": b_at}))
 
     if result.get("sweet_spots"):
         lines.append("")
         lines.append("## Sweet Spots")
         lines.append("")
+        render_title = _SWEET_SPOT_MD.format_map
+        render_reason = _SWEET_SPOT_REASON_MD.format_map
         for rank, ss in enumerate(result["sweet_spots"][:5], 1):
-            lines.append(
-                f"**{rank}. {ss['name']}** (gain score: {ss['gain_score']:.2f})"
-            )
-            lines.append(f"   vs {ss['compared_to_name']}: {ss['reason']}")
+            lines.append(render_title({**ss, "rank": rank}))
+            lines.append(render_reason(ss))
             lines.append("")
 
     if result.get("segment_bests"):
@@ -1072,10 +1542,10 @@ def format_markdown(
         lines.append("")
         lines.append("## Traps")
         lines.append("")
-        for t in result["traps"]:
-            lines.append(
-                f"- **{t['name']}** -> {t['dominated_by_name']}: {t['reason']}"
-            )
+        lines.extend(
+            f"- **{t['name']}** -> {t['dominated_by_name']}: {t['reason']}"
+            for t in result["traps"]
+        )
 
     if result.get("tier_transitions"):
         lines.append("")
@@ -1102,11 +1572,9 @@ def format_csv_output(
     if not front:
         return ""
     buf = io.StringIO()
-    cols = list(configs[front[0]].keys())
-    writer = csv.DictWriter(buf, fieldnames=cols)
+    writer = csv.DictWriter(buf, fieldnames=list(configs[front[0]]))
     writer.writeheader()
-    for i in front:
-        writer.writerow(configs[i])
+    writer.writerows(configs[i] for i in front)
     return buf.getvalue()
 
 
@@ -1145,6 +1613,13 @@ def main() -> int:
     anl.add_argument(
         "--tolerance", type=float, default=0.05, help="Trap proximity ratio (0.05)"
     )
+    anl.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for the sweet spot search on large inputs (1)",
+    )
 
     out = parser.add_argument_group("output")
     out.add_argument(
@@ -1186,6 +1661,7 @@ def main() -> int:
         threshold=args.threshold,
         tolerance=args.tolerance,
         name_field=args.name_field,
+        jobs=args.jobs,
     )
 
     if args.format == "json":
@@ -1198,14 +1674,11 @@ def main() -> int:
         print(format_csv_output(result, configs))
 
     ps = result["summary"]
+    status: list[str] = []
     if result.get("sort_field_auto_detected"):
-        print(
-            f"Auto-detected sort-by: {result['sort_field']}",
-            file=sys.stderr,
-        )
-    print(
-        f"Pareto: {ps['pareto_count']}/{ps['total']} ({ps['pareto_ratio']:.0%})",
-        file=sys.stderr,
+        status.append(f"Auto-detected sort-by: {result['sort_field']}")
+    status.append(
+        f"Pareto: {ps['pareto_count']}/{ps['total']} ({ps['pareto_ratio']:.0%})"
     )
     if "sweet_spots_count" in ps:
         parts = [
@@ -1214,7 +1687,8 @@ def main() -> int:
         ]
         if "segment_count" in ps:
             parts.append(f"Segments: {ps['segment_count']}")
-        print(", ".join(parts), file=sys.stderr)
+        status.append(", ".join(parts))
+    sys.stderr.write("\n".join(status) + "\n")
 
     return 0
 
@@ -0,0 +1,41 @@
+"""Tests for pareto-decide."""
+
+from __future__ import annotations
+
+import math
+
+from pareto_decide import compute_pareto_front
+
+NAN = math.nan
+
+
+def pairwise_front(
+    configs: list[dict[str, float]], criteria: list[dict[str, str]]
+) -> list[int]:
+    """Reference front: items no other item is at least as good as everywhere."""
+    signs = [1 if c["direction"] == "maximize" else -1 for c in criteria]
+    rows = [
+        tuple(sign * cfg[c["name"]] for sign, c in zip(signs, criteria, strict=True))
+        for cfg in configs
+    ]
+
+    def dominates(a: tuple[float, ...], b: tuple[float, ...]) -> bool:
+        pairs = list(zip(a, b, strict=True))
+        return not any(x < y for x, y in pairs) and any(x > y for x, y in pairs)
+
+    return [i for i, row in enumerate(rows) if not any(dominates(o, row) for o in rows)]
+
+
+def test_pareto_front_with_nan_row_matches_pairwise_scan() -> None:
+    # A NaN ties with everything, so dominance is no longer transitive and a
+    # sort-based sweep would keep rows that something else dominates
+    cases: list[list[tuple[float, ...]]] = [
+        [(0.0, 3.0), (1.0, NAN), (3.0, 0.0)],
+        [(3.0, 0.0, 0.0), (NAN, 2.0, NAN), (3.0, 1.0, 3.0)],
+    ]
+    for rows in cases:
+        names = ["x", "y", "z"][: len(rows[0])]
+        configs = [dict(zip(names, row, strict=True)) for row in rows]
+        criteria = [{"name": name, "direction": "maximize"} for name in names]
+        front = compute_pareto_front(configs, criteria)
+        assert front == pairwise_front(configs, criteria), rows
@@ -1,19 +1,46 @@
 """style-review: Collect GitHub PR data for style analysis and code review."""
 
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
 from .cli import main
-from .collector import collect_pr, save_docs
-from .config import get_data_dir, get_db_path, get_files_dir, get_pr_dir
+from .config import (
+    get_data_dir,
+    get_db_path,
+    get_files_dir,
+    get_pr_dir,
+    get_repo_dir,
+)
 from .db import SCHEMA, get_db
-from .github import gh_api, gh_api_paginate, list_authored_prs, list_reviewed_prs
+
+if TYPE_CHECKING:
+    from .collector import CollectOptions, collect_pr, save_docs
+    from .github import gh_api, gh_api_paginate, list_authored_prs, list_reviewed_prs
+
+# Re-exports whose modules are imported on first access, so that starting the
+# CLI does not load the GitHub client unless a command needs it
+_LAZY_EXPORTS = {
+    "CollectOptions": "collector",
+    "collect_pr": "collector",
+    "save_docs": "collector",
+    "gh_api": "github",
+    "gh_api_paginate": "github",
+    "list_authored_prs": "github",
+    "list_reviewed_prs": "github",
+}
 
 __all__ = [
     "SCHEMA",
+    "CollectOptions",
     "collect_pr",
     "get_data_dir",
     "get_db",
     "get_db_path",
     "get_files_dir",
     "get_pr_dir",
+    "get_repo_dir",
     "gh_api",
     "gh_api_paginate",
     "list_authored_prs",
@@ -21,3 +48,12 @@ __all__ = [
     "main",
     "save_docs",
 ]
+
+
+def __getattr__(name: str) -> object:
+    """Resolve the lazily imported re-exports."""
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    return getattr(importlib.import_module(f".{module}", __name__), name)
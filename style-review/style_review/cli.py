@@ -3,47 +3,70 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
+import operator
 import sqlite3
 import sys
+from collections import deque
+from datetime import UTC, datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, TextIO
 
-from .collector import collect_pr
-from .config import get_data_dir, get_db_path
+from .config import get_data_dir, get_db_path, get_files_dir
 from .db import (
     SCHEMA,
-    add_participant,
+    add_participants,
+    bulk_load_mode,
     get_db,
     get_or_create_repo,
-    get_pr_id,
-    pr_exists,
-)
-from .github import list_authored_prs, list_reviewed_prs
-from .migrate import (
-    MigrationState,
-    migrate_directory,
-    migrate_prs_directory,
+    get_pr_ids,
 )
 
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+    from .collector import PRFetches
+
+# Number of collected PRs per transaction in batch (--author/--reviewer) runs
+COMMIT_BATCH_SIZE = 50
+
+# PRs per GraphQL prefetch query in batch runs
+GRAPHQL_BATCH_SIZE = 25
+
+# New PRs whose REST requests run ahead of the one being collected
+FETCH_AHEAD = 2
+
 
 def cmd_collect(args: argparse.Namespace) -> int:
     """Handle collect subcommand."""
+    # The GitHub client is only needed here; importing it lazily keeps
+    # `query` and `db` startup cheap.
+    from .github import GitHubError, enable_response_cache
+
     base_dir = get_data_dir(args.output)
     conn = get_db(base_dir)
+    enable_response_cache(base_dir)
     exclude_bots = not args.include_bots
 
     if args.author and args.reviewer:
         print("Error: Cannot specify both --author and --reviewer", file=sys.stderr)
         return 1
 
-    if args.pr_number is not None:
-        return _collect_single_pr(args, base_dir, conn, exclude_bots)
+    try:
+        if args.pr_number is not None:
+            return _collect_single_pr(args, base_dir, conn, exclude_bots)
 
-    if args.author:
-        return _collect_by_author(args, base_dir, conn, exclude_bots)
+        if args.author:
+            return _collect_by_author(args, base_dir, conn, exclude_bots)
 
-    if args.reviewer:
-        return _collect_by_reviewer(args, base_dir, conn, exclude_bots)
+        if args.reviewer:
+            return _collect_by_reviewer(args, base_dir, conn, exclude_bots)
+    except GitHubError as e:
+        # Rows of the interrupted batch are rolled back and refetched next run
+        conn.close()
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
 
     print("Error: Must specify PR number or --author/--reviewer", file=sys.stderr)
     conn.close()
@@ -57,6 +80,8 @@ def _collect_single_pr(
     exclude_bots: bool,
 ) -> int:
     """Collect a single PR."""
+    from .collector import CollectOptions, collect_pr
+
     if args.author or args.reviewer:
         print(
             "Error: Cannot specify PR number with --author or --reviewer",
@@ -64,12 +89,55 @@ def _collect_single_pr(
         )
         return 1
     success = collect_pr(
-        args.repo, args.pr_number, base_dir, conn, exclude_bots=exclude_bots
+        args.repo,
+        args.pr_number,
+        base_dir,
+        conn,
+        exclude_bots=exclude_bots,
+        options=CollectOptions(emit_files=not args.no_docs, docs_in_db=args.docs_in_db),
     )
     conn.close()
     return 0 if success else 1
 
 
+def _with_prefetched(
+    repo: str,
+    pr_numbers: list[int],
+    existing: dict[int, int],
+) -> Iterator[tuple[int, dict[str, Any] | None]]:
+    """Yield PR numbers with GraphQL-prefetched data for those not yet stored."""
+    from .github import fetch_pr_batch
+
+    for start in range(0, len(pr_numbers), GRAPHQL_BATCH_SIZE):
+        batch = pr_numbers[start : start + GRAPHQL_BATCH_SIZE]
+        prefetched = fetch_pr_batch(repo, [n for n in batch if n not in existing])
+        for pr_num in batch:
+            yield pr_num, prefetched.get(pr_num)
+
+
+def _with_fetches(
+    repo: str,
+    pr_numbers: list[int],
+    existing: dict[int, int],
+) -> Iterator[tuple[int, PRFetches | None]]:
+    """Yield PR numbers with their API requests started FETCH_AHEAD PRs early.
+
+    While one PR is written to disk and the database, the next ones are
+    already being fetched on the collector's thread pool.
+    """
+    from .collector import start_pr_fetches
+
+    window: deque[tuple[int, PRFetches | None]] = deque()
+    for pr_num, prefetched in _with_prefetched(repo, pr_numbers, existing):
+        fetches = (
+            None if pr_num in existing else start_pr_fetches(repo, pr_num, prefetched)
+        )
+        window.append((pr_num, fetches))
+        if len(window) > FETCH_AHEAD:
+            yield window.popleft()
+    yield from window
+
+
 def _collect_by_author(
     args: argparse.Namespace,
     base_dir: Path,
@@ -77,6 +145,9 @@ def _collect_by_author(
     exclude_bots: bool,
 ) -> int:
     """Collect PRs by author."""
+    from .collector import CollectOptions, collect_pr
+    from .github import list_authored_prs
+
     pr_numbers = list_authored_prs(
         args.repo, args.author, args.limit, args.state, args.since
     )
@@ -89,15 +160,33 @@ def _collect_by_author(
     success_count = 0
     skipped_count = 0
     repo_id = get_or_create_repo(conn, args.repo)
+    existing = get_pr_ids(conn, repo_id, pr_numbers)
+    options = CollectOptions(
+        commit=False,
+        emit_files=not args.no_docs,
+        docs_in_db=args.docs_in_db,
+        collected_at=datetime.now(UTC).isoformat(),
+    )
 
-    for pr_num in pr_numbers:
-        if args.skip_existing and pr_exists(conn, repo_id, pr_num):
+    for pr_num, fetches in _with_fetches(args.repo, pr_numbers, existing):
+        if args.skip_existing and pr_num in existing:
             skipped_count += 1
             continue
         if collect_pr(
-            args.repo, pr_num, base_dir, conn, "authored", args.author, exclude_bots
+            args.repo,
+            pr_num,
+            base_dir,
+            conn,
+            "authored",
+            args.author,
+            exclude_bots,
+            options=options,
+            fetches=fetches,
         ):
             success_count += 1
+            if success_count % COMMIT_BATCH_SIZE == 0:
+                conn.commit()
+    conn.commit()
 
     print(
         f"Collected {success_count}/{len(pr_numbers)} PRs "
@@ -115,6 +204,9 @@ def _collect_by_reviewer(
     exclude_bots: bool,
 ) -> int:
     """Collect PRs by reviewer."""
+    from .collector import CollectOptions, collect_pr
+    from .github import list_reviewed_prs
+
     pr_numbers = list_reviewed_prs(
         args.repo, args.reviewer, args.limit, args.state, args.since
     )
@@ -127,19 +219,37 @@ def _collect_by_reviewer(
     success_count = 0
     skipped_count = 0
     repo_id = get_or_create_repo(conn, args.repo)
+    existing = get_pr_ids(conn, repo_id, pr_numbers)
+    options = CollectOptions(
+        commit=False,
+        emit_files=not args.no_docs,
+        docs_in_db=args.docs_in_db,
+        collected_at=datetime.now(UTC).isoformat(),
+    )
 
-    for pr_num in pr_numbers:
-        if args.skip_existing and pr_exists(conn, repo_id, pr_num):
-            pr_id = get_pr_id(conn, repo_id, pr_num)
-            if pr_id:
-                add_participant(conn, pr_id, args.reviewer, "reviewer")
-                conn.commit()
+    skipped_participants: list[tuple[int, str, str]] = []
+
+    for pr_num, fetches in _with_fetches(args.repo, pr_numbers, existing):
+        if args.skip_existing and pr_num in existing:
+            skipped_participants.append((existing[pr_num], args.reviewer, "reviewer"))
             skipped_count += 1
             continue
         if collect_pr(
-            args.repo, pr_num, base_dir, conn, "reviewed", args.reviewer, exclude_bots
+            args.repo,
+            pr_num,
+            base_dir,
+            conn,
+            "reviewed",
+            args.reviewer,
+            exclude_bots,
+            options=options,
+            fetches=fetches,
         ):
             success_count += 1
+            if success_count % COMMIT_BATCH_SIZE == 0:
+                conn.commit()
+    add_participants(conn, skipped_participants)
+    conn.commit()
 
     print(
         f"Collected {success_count}/{len(pr_numbers)} PRs "
@@ -150,72 +260,99 @@ def _collect_by_reviewer(
     return 0 if success_count > 0 or skipped_count > 0 else 1
 
 
-def _format_json(rows: list[sqlite3.Row], columns: list[str]) -> str:
-    """Format rows as JSON."""
-    data = [
-        {col: (row[col] if row[col] is not None else None) for col in columns}
-        for row in rows
-    ]
-    return json.dumps(data, indent=2)
-
-
-def _format_csv(rows: list[sqlite3.Row], columns: list[str]) -> str:
-    """Format rows as CSV."""
-    lines = [",".join(f'"{col}"' for col in columns)]
+def _write_json(
+    rows: Iterable[tuple[Any, ...]], columns: list[str], out: TextIO
+) -> None:
+    """Write rows as a JSON array, one object at a time.
+
+    json.dumps only uses its C encoder without indent, so each scalar is
+    encoded on its own and the indent=2 layout is assembled here.
+    """
+    encode = json.JSONEncoder().encode
+    # One key per name; a repeated column keeps its first occurrence
+    positions: dict[str, int] = {}
+    for i, col in enumerate(columns):
+        positions.setdefault(col, i)
+    keys = [f"\n    {encode(col)}: " for col in positions]
+    unique = len(positions) == len(columns)
+
+    out.write("[")
+    sep = "\n  {"
     for row in rows:
-        vals = []
-        for col in columns:
-            val = row[col]
-            if val is None:
-                vals.append("")
-            elif isinstance(val, str) and ("," in val or '"' in val):
-                vals.append(f'"{val.replace(chr(34), chr(34) + chr(34))}"')
-            else:
-                vals.append(str(val))
-        lines.append(",".join(vals))
-    return "\n".join(lines)
-
-
-def _format_table(rows: list[sqlite3.Row], columns: list[str]) -> str:
-    """Format rows as ASCII table."""
+        values = row if unique else [row[i] for i in positions.values()]
+        out.write(sep + ",".join(map(operator.add, keys, map(encode, values))))
+        out.write("\n  }")
+        sep = ",\n  {"
+    out.write("\n]\n")
+
+
+def _csv_field(val: object) -> str:
+    """Render a single CSV field, quoting strings with commas or quotes."""
+    if val is None:
+        return ""
+    if isinstance(val, str) and ("," in val or '"' in val):
+        return f'"{val.replace(chr(34), chr(34) + chr(34))}"'
+    return str(val)
+
+
+def _write_csv(
+    rows: Iterable[tuple[Any, ...]], columns: list[str], out: TextIO
+) -> None:
+    """Write rows as CSV."""
+    out.write(",".join(f'"{col}"' for col in columns) + "\n")
+    out.writelines(",".join(map(_csv_field, row)) + "\n" for row in rows)
+
+
+def _write_table(
+    rows: Iterable[tuple[Any, ...]], columns: list[str], out: TextIO
+) -> None:
+    """Write rows as ASCII table (column widths need every row first)."""
+    cells = [[str(val) if val is not None else "" for val in row] for row in rows]
     widths = [len(col) for col in columns]
-    for row in rows:
-        for i, col in enumerate(columns):
-            val = str(row[col]) if row[col] is not None else ""
-            widths[i] = max(widths[i], len(val))
-
-    header = " | ".join(col.ljust(widths[i]) for i, col in enumerate(columns))
-    separator = "-+-".join("-" * w for w in widths)
-
-    lines = [header, separator]
-    for row in rows:
-        line = " | ".join(
-            (str(row[col]) if row[col] is not None else "").ljust(widths[i])
-            for i, col in enumerate(columns)
-        )
-        lines.append(line)
-    return "\n".join(lines)
-
-
-def _format_tsv(rows: list[sqlite3.Row], columns: list[str]) -> str:
-    """Format rows as TSV."""
-    lines = ["\t".join(columns)]
-    lines.extend(
-        "\t".join(str(row[col]) if row[col] is not None else "" for col in columns)
+    for i, column_cells in enumerate(zip(*cells, strict=True)):
+        widths[i] = max(widths[i], *map(len, column_cells))
+
+    # One left-aligned, padded field per column
+    template = " | ".join(f"{{:<{w}}}" for w in widths) + "\n"
+    out.write(template.format(*columns))
+    out.write("-+-".join("-" * w for w in widths) + "\n")
+    out.writelines(template.format(*row_cells) for row_cells in cells)
+
+
+def _write_tsv(
+    rows: Iterable[tuple[Any, ...]], columns: list[str], out: TextIO
+) -> None:
+    """Write rows as TSV."""
+    out.write("\t".join(columns) + "\n")
+    out.writelines(
+        "\t".join(str(val) if val is not None else "" for val in row) + "\n"
         for row in rows
     )
-    return "\n".join(lines)
 
 
-def format_rows(rows: list[sqlite3.Row], columns: list[str], fmt: str) -> str:
-    """Format query results in specified format."""
-    formatters = {
-        "json": _format_json,
-        "csv": _format_csv,
-        "table": _format_table,
-        "tsv": _format_tsv,
+def write_rows(
+    rows: Iterable[tuple[Any, ...]], columns: list[str], fmt: str, out: TextIO
+) -> None:
+    """Write query results to out in the specified format.
+
+    Rows are plain tuples in column order, so values are read by position.
+    As with sqlite3.Row lookups by name, a repeated column name shows the
+    value of its first occurrence. Every format except table writes rows as
+    they are consumed.
+    """
+    first: dict[str, int] = {}
+    for i, col in enumerate(columns):
+        first.setdefault(col, i)
+    if len(first) < len(columns):
+        rows = map(operator.itemgetter(*(first[col] for col in columns)), rows)
+
+    writers = {
+        "json": _write_json,
+        "csv": _write_csv,
+        "table": _write_table,
+        "tsv": _write_tsv,
     }
-    return formatters.get(fmt, _format_tsv)(rows, columns)
+    writers.get(fmt, _write_tsv)(rows, columns, out)
 
 
 def cmd_query(args: argparse.Namespace) -> int:
@@ -228,18 +365,17 @@ def cmd_query(args: argparse.Namespace) -> int:
         return 1
 
     conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
 
     try:
         cursor = conn.execute(args.sql)
-        rows = cursor.fetchall()
+        first = cursor.fetchone()
 
-        if not rows:
+        if first is None:
             print("No results", file=sys.stderr)
             return 0
 
         columns = [desc[0] for desc in cursor.description]
-        print(format_rows(rows, columns, args.format))
+        write_rows(itertools.chain([first], cursor), columns, args.format, sys.stdout)
 
     except sqlite3.Error as e:
         print(f"SQL Error: {e}", file=sys.stderr)
@@ -258,15 +394,25 @@ def cmd_db_schema(args: argparse.Namespace) -> int:
 
 def cmd_db_migrate(args: argparse.Namespace) -> int:
     """Migrate existing data from old structure to new structure."""
+    from .migrate import (
+        MigrationState,
+        migrate_directory,
+        migrate_prs_directory,
+        remove_migrated_dirs,
+    )
+
     base_dir = get_data_dir(args.output)
     conn = get_db(base_dir)
     state = MigrationState()
 
-    migrate_directory(conn, base_dir, base_dir / "authored", "authored", state)
-    migrate_directory(conn, base_dir, base_dir / "reviewed", "reviewed", state)
-    migrate_prs_directory(conn, base_dir, base_dir / "prs", state)
+    with bulk_load_mode(conn):
+        migrate_directory(conn, base_dir, base_dir / "authored", "authored", state)
+        migrate_directory(conn, base_dir, base_dir / "reviewed", "reviewed", state)
+        migrate_prs_directory(conn, base_dir, base_dir / "prs", state)
 
+    conn.commit()
     conn.close()
+    remove_migrated_dirs(state)
 
     print("\nMigration complete:", file=sys.stderr)
     print(f"  Migrated: {state.migrated}", file=sys.stderr)
@@ -276,6 +422,29 @@ def cmd_db_migrate(args: argparse.Namespace) -> int:
     return 0
 
 
+def cmd_db_dump(args: argparse.Namespace) -> int:
+    """Recreate the on-disk bundles of PRs collected with --docs-in-db."""
+    from .collector import dump_bundle
+
+    base_dir = get_data_dir(args.output)
+    conn = get_db(base_dir)
+    files_dir = get_files_dir(base_dir)
+
+    cursor = conn.execute(
+        """SELECT id, file_path FROM prs
+           WHERE id IN (SELECT DISTINCT pr_id FROM doc_blobs)"""
+    )
+    bundles = 0
+    for pr_id, file_path in cursor.fetchall():
+        count = dump_bundle(conn, pr_id, files_dir / file_path)
+        print(f"  Dumped {count} files: {file_path}", file=sys.stderr)
+        bundles += 1
+    conn.close()
+
+    print(f"Dumped {bundles} bundles to {files_dir}", file=sys.stderr)
+    return 0
+
+
 def main() -> int:
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -304,6 +473,17 @@ def main() -> int:
     collect_parser.add_argument("--skip-existing", action="store_true")
     collect_parser.add_argument("--exclude-bots", action="store_true", default=True)
     collect_parser.add_argument("--include-bots", action="store_true")
+    collect_parser.add_argument(
+        "--no-docs",
+        action="store_true",
+        help="Only record metadata in the database; skip docs, diffs and code",
+    )
+    collect_parser.add_argument(
+        "--docs-in-db",
+        action="store_true",
+        help="Store bundle files in the database instead of on disk (see db dump)",
+    )
+    collect_parser.set_defaults(func=cmd_collect)
 
     # query subcommand
     query_parser = subparsers.add_parser("query", help="Execute SQL query on database")
@@ -315,23 +495,22 @@ def main() -> int:
         default="tsv",
         help="Output format (default: tsv)",
     )
+    query_parser.set_defaults(func=cmd_query)
 
     # db subcommand
     db_parser = subparsers.add_parser("db", help="Database management")
     db_subparsers = db_parser.add_subparsers(dest="db_command", required=True)
-    db_subparsers.add_parser("schema", help="Show database schema")
-    db_subparsers.add_parser("migrate", help="Migrate existing data to new structure")
+    schema_parser = db_subparsers.add_parser("schema", help="Show database schema")
+    schema_parser.set_defaults(func=cmd_db_schema)
+    migrate_parser = db_subparsers.add_parser(
+        "migrate", help="Migrate existing data to new structure"
+    )
+    migrate_parser.set_defaults(func=cmd_db_migrate)
+    dump_parser = db_subparsers.add_parser(
+        "dump", help="Write bundles stored with --docs-in-db to disk"
+    )
+    dump_parser.set_defaults(func=cmd_db_dump)
 
     args = parser.parse_args()
-
-    if args.command == "collect":
-        return cmd_collect(args)
-    if args.command == "query":
-        return cmd_query(args)
-    if args.command == "db":
-        if args.db_command == "schema":
-            return cmd_db_schema(args)
-        if args.db_command == "migrate":
-            return cmd_db_migrate(args)
-
-    return 1
+    handler: Callable[[argparse.Namespace], int] = args.func
+    return handler(args)
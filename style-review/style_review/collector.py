@@ -2,17 +2,73 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import sqlite3
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
 from .config import get_file_extension, get_pr_dir
-from .db import add_participant, get_or_create_repo, get_pr_id
-from .github import get_file_at_ref, gh_api, gh_api_paginate, is_bot
+from .db import (
+    SQL_INSERT_COMMENT,
+    SQL_INSERT_DOC_BLOB,
+    SQL_INSERT_FILE,
+    SQL_INSERT_PR,
+    SQL_INSERT_REVIEW,
+    add_participant,
+    add_participants,
+    get_or_create_repo,
+    get_pr_id,
+)
+from .github import (
+    get_file_at_ref,
+    get_files_at_ref,
+    gh_api,
+    gh_api_paginate,
+    is_bot,
+)
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC
+_DIR_FLAGS = os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC
+
+# Bundle subdirectories written by _fetch_files and save_docs
+_BUNDLE_SUBDIRS = (
+    "code",
+    "diffs",
+    "docs",
+    "docs/comments",
+    "docs/reviews",
+    "docs/discussion",
+)
+
+# Concurrent GitHub requests per process; kept small to stay clear of the
+# secondary rate limits.
+API_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="gh-api")
+
+
+@dataclass(frozen=True)
+class CollectOptions:
+    """Per-run options of ``collect_pr``.
+
+    ``commit=False`` leaves the transaction open so batch callers can commit
+    many PRs at once. ``emit_files=False`` skips the markdown docs, diffs and
+    code, keeping only ``meta.json`` and the database records.
+    ``docs_in_db=True`` stores the bundle files, ``meta.json`` included, in
+    doc_blobs instead of on disk; ``dump_bundle`` writes them back out. Batch
+    callers pass one ``collected_at`` timestamp for the whole run.
+    """
+
+    commit: bool = True
+    emit_files: bool = True
+    docs_in_db: bool = False
+    collected_at: str | None = None
 
 
 @dataclass
@@ -22,20 +78,89 @@ class CollectedRecords:
     files: list[dict[str, Any]] = field(default_factory=list)
     comments: list[dict[str, Any]] = field(default_factory=list)
     reviews: list[dict[str, Any]] = field(default_factory=list)
+    # Bundle files as (kind, name, content) when they go to doc_blobs
+    docs: list[tuple[str, str, bytes]] = field(default_factory=list)
+
+
+def _write_docs(docs: dict[Path, list[tuple[str, bytes]]]) -> None:
+    """Write bundle files (docs, diffs, code), grouped by directory.
+
+    Each directory is opened once and its files are created relative to that
+    descriptor (openat), so the kernel does not re-resolve the bundle path for
+    every file.
+    """
+    for directory, entries in docs.items():
+        dir_fd = os.open(directory, _DIR_FLAGS)
+        try:
+            for name, data in entries:
+                fd = os.open(name, _WRITE_FLAGS, 0o666, dir_fd=dir_fd)
+                try:
+                    view = memoryview(data)
+                    while view:
+                        view = view[os.write(fd, view) :]
+                finally:
+                    os.close(fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _ensure_bundle_dirs(bundle_dir: Path, emit_files: bool = True) -> None:
+    """Create the bundle directory tree once per PR, parents before children."""
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    if emit_files:
+        for subdir in _BUNDLE_SUBDIRS:
+            (bundle_dir / subdir).mkdir(exist_ok=True)
+
+
+def _store_docs(
+    docs: dict[Path, list[tuple[str, bytes]]],
+    bundle_dir: Path,
+    blobs: list[tuple[str, str, bytes]] | None,
+) -> None:
+    """Write bundle files to disk, or queue them for doc_blobs if blobs is given."""
+    if blobs is None:
+        _write_docs(docs)
+        return
+    for directory, entries in docs.items():
+        kind = directory.relative_to(bundle_dir).as_posix()
+        blobs.extend((kind, name, data) for name, data in entries)
+
+
+def dump_bundle(conn: sqlite3.Connection, pr_id: int, path: Path) -> int:
+    """Recreate a PR bundle stored in doc_blobs under path. Returns file count."""
+    docs: dict[Path, list[tuple[str, bytes]]] = {}
+    cursor = conn.execute(
+        "SELECT kind, name, content FROM doc_blobs WHERE pr_id = ?", (pr_id,)
+    )
+    for kind, name, content in cursor:
+        docs.setdefault(path / kind, []).append((name, content))
+    for directory in docs:
+        directory.mkdir(parents=True, exist_ok=True)
+    _write_docs(docs)
+    return sum(len(entries) for entries in docs.values())
+
+
+def _bundle_name(filename: str) -> str:
+    """Flat, collision-free name for a repo path inside code/ and diffs/.
 
+    A short hash of the full path keeps names unique and bounded in length;
+    the basename keeps the extension for search tools.
+    """
+    digest = hashlib.blake2b(filename.encode(), digest_size=8).hexdigest()
+    return f"{digest}_{filename.rsplit('/', 1)[-1]}"
 
-def _save_summary(docs_dir: Path, pr_data: dict[str, Any]) -> None:
-    """Save PR summary (body)."""
+
+def _render_summary(pr_data: dict[str, Any], author: str) -> str:
+    """Render PR summary (body)."""
     title = pr_data.get("title", "")
     body = pr_data.get("body") or ""
-    author = (pr_data.get("user") or {}).get("login", "")
     state = pr_data.get("state", "")
     merged = pr_data.get("merged", False)
     merged_at = pr_data.get("merged_at") or ""
     labels = [label.get("name", "") for label in pr_data.get("labels", [])]
     url = pr_data.get("html_url", "")
 
-    summary_content = f"""# {title}
+    return f"""# {title}
 
 Author: {author} | State: {state} | Merged: {merged}
 {f"Merged at: {merged_at}" if merged_at else ""}
@@ -46,20 +171,89 @@ URL: {url}
 
 {body}
 """
-    (docs_dir / "summary.md").write_text(summary_content)
 
 
-def _collect_line_comments(
-    comments_dir: Path,
+def _resolved[T](value: T) -> Future[T]:
+    """Wrap an already available value as a completed future."""
+    future: Future[T] = Future()
+    future.set_result(value)
+    return future
+
+
+def _submit_doc_fetches(
+    repo: str,
+    pr_number: int,
+    prefetched: dict[str, Any] | None = None,
+) -> dict[str, Future[list[dict[str, Any]]]]:
+    """Start fetching line comments, reviews, and discussion concurrently.
+
+    Lists already present in ``prefetched`` are used instead of fetched.
+    """
+    endpoints = {
+        "comments": f"/repos/{repo}/pulls/{pr_number}/comments",
+        "reviews": f"/repos/{repo}/pulls/{pr_number}/reviews",
+        "discussion": f"/repos/{repo}/issues/{pr_number}/comments",
+    }
+    prefetched = prefetched or {}
+    return {
+        kind: _resolved(prefetched[kind])
+        if kind in prefetched
+        else _executor.submit(gh_api_paginate, endpoint)
+        for kind, endpoint in endpoints.items()
+    }
+
+
+@dataclass
+class PRFetches:
+    """GitHub requests for one PR, started before collect_pr needs them."""
+
+    pr: Future[dict[str, Any] | list[dict[str, Any]] | None]
+    files: Future[list[dict[str, Any]]]
+    docs: dict[str, Future[list[dict[str, Any]]]]
+
+    def cancel(self) -> None:
+        """Cancel the requests that have not started yet."""
+        futures: list[Future[Any]] = [self.pr, self.files, *self.docs.values()]
+        for future in futures:
+            future.cancel()
+
+
+def start_pr_fetches(
     repo: str,
     pr_number: int,
+    prefetched: dict[str, Any] | None = None,
+) -> PRFetches:
+    """Start all API requests collect_pr makes for a PR.
+
+    The endpoints are independent, so they are all requested up front.
+    Batch callers start the next PRs' requests while the current one is
+    being written out.
+    """
+    pr_future: Future[dict[str, Any] | list[dict[str, Any]] | None] = (
+        _resolved(prefetched["pr"])
+        if prefetched and "pr" in prefetched
+        else _executor.submit(gh_api, f"/repos/{repo}/pulls/{pr_number}")
+    )
+    return PRFetches(
+        pr=pr_future,
+        files=_executor.submit(
+            gh_api_paginate, f"/repos/{repo}/pulls/{pr_number}/files"
+        ),
+        docs=_submit_doc_fetches(repo, pr_number, prefetched),
+    )
+
+
+def _collect_line_comments(
+    comments: list[dict[str, Any]],
     exclude_bots: bool,
+    docs: list[tuple[str, bytes]],
+    emit_files: bool = True,
 ) -> tuple[int, list[dict[str, Any]]]:
-    """Collect and save line comments. Returns count and records."""
+    """Render line comments into docs. Returns count and records."""
     count = 0
     records: list[dict[str, Any]] = []
 
-    for comment in gh_api_paginate(f"/repos/{repo}/pulls/{pr_number}/comments"):
+    for comment in comments:
         user = comment.get("user") or {}
         user_is_bot = is_bot(user)
         if exclude_bots and user_is_bot:
@@ -71,7 +265,8 @@ def _collect_line_comments(
         line = comment.get("line") or comment.get("original_line") or 0
         created_at = comment.get("created_at", "")
 
-        content = f"""# Comment by {commenter}
+        if emit_files:
+            content = f"""# Comment by {commenter}
 
 File: `{path}` | Line: {line} | Side: {comment.get("side", "RIGHT")}
 
@@ -85,7 +280,7 @@ File: `{path}` | Line: {line} | Side: {comment.get("side", "RIGHT")}
 
 {comment.get("body", "")}
 """
-        (comments_dir / f"comment-{comment_id}.md").write_text(content)
+            docs.append((f"comment-{comment_id}.md", content.encode()))
         count += 1
 
         records.append(
@@ -104,18 +299,18 @@ File: `{path}` | Line: {line} | Side: {comment.get("side", "RIGHT")}
 
 
 def _collect_reviews(
-    reviews_dir: Path,
-    repo: str,
-    pr_number: int,
+    reviews: list[dict[str, Any]],
     pr_author: str,
     exclude_bots: bool,
+    docs: list[tuple[str, bytes]],
+    emit_files: bool = True,
 ) -> tuple[int, list[dict[str, Any]], list[dict[str, Any]]]:
-    """Collect and save reviews. Returns count, comment records, review records."""
+    """Render reviews into docs. Returns count, comment records, review records."""
     count = 0
     comment_records: list[dict[str, Any]] = []
     review_records: list[dict[str, Any]] = []
 
-    for review in gh_api_paginate(f"/repos/{repo}/pulls/{pr_number}/reviews"):
+    for review in reviews:
         user = review.get("user") or {}
         user_is_bot = is_bot(user)
         if exclude_bots and user_is_bot:
@@ -140,7 +335,8 @@ def _collect_reviews(
         if not body and state == "APPROVED":
             continue
 
-        content = f"""# Review by {reviewer}
+        if emit_files:
+            content = f"""# Review by {reviewer}
 
 State: {state}
 Submitted: {submitted_at}
@@ -149,7 +345,7 @@ Submitted: {submitted_at}
 
 {body if body else "(No summary provided)"}
 """
-        (reviews_dir / f"review-{review_id}.md").write_text(content)
+            docs.append((f"review-{review_id}.md", content.encode()))
         count += 1
 
         comment_records.append(
@@ -168,16 +364,16 @@ Submitted: {submitted_at}
 
 
 def _collect_discussion(
-    discussion_dir: Path,
-    repo: str,
-    pr_number: int,
+    comments: list[dict[str, Any]],
     exclude_bots: bool,
+    docs: list[tuple[str, bytes]],
+    emit_files: bool = True,
 ) -> tuple[int, list[dict[str, Any]]]:
-    """Collect and save discussion comments. Returns count and records."""
+    """Render discussion comments into docs. Returns count and records."""
     count = 0
     records: list[dict[str, Any]] = []
 
-    for comment in gh_api_paginate(f"/repos/{repo}/issues/{pr_number}/comments"):
+    for comment in comments:
         user = comment.get("user") or {}
         user_is_bot = is_bot(user)
         if exclude_bots and user_is_bot:
@@ -187,13 +383,14 @@ def _collect_discussion(
         commenter = user.get("login", "unknown") if user else "unknown"
         created_at = comment.get("created_at", "")
 
-        content = f"""# Comment by {commenter}
+        if emit_files:
+            content = f"""# Comment by {commenter}
 
 Date: {created_at}
 
 {comment.get("body", "")}
 """
-        (discussion_dir / f"disc-{comment_id}.md").write_text(content)
+            docs.append((f"disc-{comment_id}.md", content.encode()))
         count += 1
 
         records.append(
@@ -217,54 +414,87 @@ def save_docs(
     repo: str,
     pr_number: int,
     exclude_bots: bool = True,
+    *,
+    fetches: dict[str, Future[list[dict[str, Any]]]] | None = None,
+    emit_files: bool = True,
+    blobs: list[tuple[str, str, bytes]] | None = None,
 ) -> tuple[dict[str, int], list[dict[str, Any]], list[dict[str, Any]]]:
-    """Fetch and save documentation. Returns counts, comment records, review records."""
+    """Fetch and save documentation. Returns counts, comment records, review records.
+
+    ``fetches`` takes requests already started by ``_submit_doc_fetches``;
+    otherwise the three endpoints are fetched concurrently here. With
+    ``emit_files=False`` only the records are built and nothing is written.
+    Given ``blobs``, the docs are appended there instead of written to disk.
+    """
+    if fetches is None:
+        fetches = _submit_doc_fetches(repo, pr_number)
     docs_dir = bundle_dir / "docs"
-    docs_dir.mkdir(parents=True, exist_ok=True)
+    comments_dir = docs_dir / "comments"
+    reviews_dir = docs_dir / "reviews"
+    discussion_dir = docs_dir / "discussion"
 
     counts = {"summary": 1, "comments": 0, "reviews": 0, "discussion": 0}
     comment_records: list[dict[str, Any]] = []
     review_records: list[dict[str, Any]] = []
     pr_author = (pr_data.get("user") or {}).get("login", "")
 
-    _save_summary(docs_dir, pr_data)
+    # Render everything first, then write the bundle in one pass
+    docs: dict[Path, list[tuple[str, bytes]]] = {
+        docs_dir: [],
+        comments_dir: [],
+        reviews_dir: [],
+        discussion_dir: [],
+    }
+    if emit_files:
+        docs[docs_dir].append(
+            ("summary.md", _render_summary(pr_data, pr_author).encode())
+        )
 
-    comments_dir = docs_dir / "comments"
-    comments_dir.mkdir(exist_ok=True)
     counts["comments"], records = _collect_line_comments(
-        comments_dir, repo, pr_number, exclude_bots
+        fetches["comments"].result(), exclude_bots, docs[comments_dir], emit_files
     )
     comment_records.extend(records)
 
-    reviews_dir = docs_dir / "reviews"
-    reviews_dir.mkdir(exist_ok=True)
     counts["reviews"], c_recs, r_recs = _collect_reviews(
-        reviews_dir, repo, pr_number, pr_author, exclude_bots
+        fetches["reviews"].result(),
+        pr_author,
+        exclude_bots,
+        docs[reviews_dir],
+        emit_files,
     )
     comment_records.extend(c_recs)
     review_records.extend(r_recs)
 
-    discussion_dir = docs_dir / "discussion"
-    discussion_dir.mkdir(exist_ok=True)
     counts["discussion"], records = _collect_discussion(
-        discussion_dir, repo, pr_number, exclude_bots
+        fetches["discussion"].result(), exclude_bots, docs[discussion_dir], emit_files
     )
     comment_records.extend(records)
 
+    if emit_files:
+        _store_docs(docs, bundle_dir, blobs)
+
     return counts, comment_records, review_records
 
 
 def _fetch_files(
     repo: str,
-    pr_number: int,
+    files: list[dict[str, Any]],
     head_sha: str,
     code_dir: Path,
     diffs_dir: Path,
+    emit_files: bool = True,
+    blobs: list[tuple[str, str, bytes]] | None = None,
 ) -> list[dict[str, Any]]:
-    """Fetch changed files and save code/diffs. Returns file records."""
+    """Save diffs and fetch changed file contents. Returns file records.
+
+    With ``emit_files=False`` no contents are fetched and nothing is written.
+    Given ``blobs``, diffs and code are appended there instead of written.
+    """
     file_records: list[dict[str, Any]] = []
+    to_fetch: list[str] = []
+    patches: list[tuple[str, bytes]] = []
 
-    for file_info in gh_api_paginate(f"/repos/{repo}/pulls/{pr_number}/files"):
+    for file_info in files:
         filename = file_info.get("filename", "")
         if not filename:
             continue
@@ -274,29 +504,51 @@ def _fetch_files(
         additions = file_info.get("additions", 0)
         deletions = file_info.get("deletions", 0)
 
-        if status not in ("removed",) and not patch and additions > 0:
-            print(f"  Skipping binary: {filename}", file=sys.stderr)
-            continue
-
+        safe_name = _bundle_name(filename)
         file_records.append(
             {
                 "file_path": filename,
+                "bundle_name": safe_name,
                 "change_type": status,
                 "additions": additions,
                 "deletions": deletions,
             }
         )
 
-        safe_name = filename.replace("/", "__")
+        if not emit_files:
+            continue
+
         if patch:
-            (diffs_dir / f"{safe_name}.patch").write_text(patch)
+            patches.append((f"{safe_name}.patch", patch.encode()))
 
+        # Binary files stay in the records; their content is dropped when
+        # fetched (see get_files_at_ref and decode_base64_content)
         if status in ("added", "modified", "renamed", "copied"):
-            content = get_file_at_ref(repo, filename, head_sha)
-            if content:
-                (code_dir / safe_name).write_text(content)
-                print(f"  Saved: {filename}", file=sys.stderr)
-
+            to_fetch.append(filename)
+
+    if not emit_files:
+        return file_records
+
+    # One GraphQL query answers text and binary files; the rest go over REST
+    contents = get_files_at_ref(repo, to_fetch, head_sha)
+    missing = [filename for filename in to_fetch if filename not in contents]
+    contents.update(
+        zip(
+            missing,
+            _executor.map(
+                lambda filename: get_file_at_ref(repo, filename, head_sha), missing
+            ),
+            strict=True,
+        )
+    )
+    code: list[tuple[str, bytes]] = []
+    for filename in to_fetch:
+        content = contents[filename]
+        if content:
+            code.append((_bundle_name(filename), content))
+            print(f"  Saved: {filename}", file=sys.stderr)
+
+    _store_docs({diffs_dir: patches, code_dir: code}, code_dir.parent, blobs)
     return file_records
 
 
@@ -304,31 +556,27 @@ def _insert_pr_record(
     conn: sqlite3.Connection,
     repo_id: int,
     pr_number: int,
-    pr_data: dict[str, Any],
+    meta: dict[str, Any],
     file_path: str,
+    collected_at: str | None = None,
 ) -> int:
-    """Insert PR into database and return PR ID."""
-    pr_author = (pr_data.get("user") or {}).get("login", "")
-    labels = json.dumps([label.get("name", "") for label in pr_data.get("labels", [])])
-
+    """Insert PR from its bundle metadata into database and return PR ID."""
+    pr_author = meta["author"]
     cursor = conn.execute(
-        """INSERT INTO prs
-           (repo_id, number, title, author, state, merged, created_at, merged_at,
-            labels, url, file_path, collected_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        SQL_INSERT_PR,
         (
             repo_id,
             pr_number,
-            pr_data.get("title", ""),
+            meta["title"],
             pr_author,
-            pr_data.get("state", ""),
-            1 if pr_data.get("merged") else 0,
-            pr_data.get("created_at", ""),
-            pr_data.get("merged_at"),
-            labels,
-            pr_data.get("html_url", ""),
+            meta["state"],
+            1 if meta["merged"] else 0,
+            meta["created_at"],
+            meta["merged_at"],
+            json.dumps(meta["labels"]),
+            meta["url"],
             file_path,
-            datetime.now(UTC).isoformat(),
+            collected_at or datetime.now(UTC).isoformat(),
         ),
     )
     pr_id = cursor.lastrowid
@@ -345,22 +593,26 @@ def _insert_related_records(
     records: CollectedRecords,
 ) -> None:
     """Insert files, comments, and reviews for a PR."""
-    # Insert files
-    for f in records.files:
-        conn.execute(
-            """INSERT OR IGNORE INTO pr_files
-               (pr_id, file_path, change_type, additions, deletions)
-               VALUES (?, ?, ?, ?, ?)""",
-            (pr_id, f["file_path"], f["change_type"], f["additions"], f["deletions"]),
-        )
-
-    # Insert comments and track commenters
-    commenters = set()
+    # Drop repeated GitHub IDs (first one wins, as INSERT OR IGNORE would)
+    # so SQLite is not probed for rows it will ignore anyway.
+    comments: dict[int, dict[str, Any]] = {}
     for c in records.comments:
-        conn.execute(
-            """INSERT OR IGNORE INTO comments
-               (pr_id, github_id, author, comment_type, file_path, line_number, created_at, is_bot)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        comments.setdefault(c["github_id"], c)
+    reviews: dict[int, dict[str, Any]] = {}
+    for r in records.reviews:
+        reviews.setdefault(r["github_id"], r)
+
+    conn.executemany(
+        SQL_INSERT_FILE,
+        [
+            (pr_id, f["file_path"], f["change_type"], f["additions"], f["deletions"])
+            for f in records.files
+        ],
+    )
+
+    conn.executemany(
+        SQL_INSERT_COMMENT,
+        [
             (
                 pr_id,
                 c["github_id"],
@@ -370,20 +622,16 @@ def _insert_related_records(
                 c["line_number"],
                 c["created_at"],
                 c["is_bot"],
-            ),
-        )
-        if c["author"] != pr_author:
-            commenters.add(c["author"])
+            )
+            for c in comments.values()
+        ],
+    )
 
-    for commenter in commenters:
-        add_participant(conn, pr_id, commenter, "commenter")
+    conn.executemany(SQL_INSERT_DOC_BLOB, [(pr_id, *doc) for doc in records.docs])
 
-    # Insert reviews
-    for r in records.reviews:
-        conn.execute(
-            """INSERT OR IGNORE INTO reviews
-               (pr_id, github_id, reviewer, pr_author, state, submitted_at)
-               VALUES (?, ?, ?, ?, ?, ?)""",
+    conn.executemany(
+        SQL_INSERT_REVIEW,
+        [
             (
                 pr_id,
                 r["github_id"],
@@ -391,9 +639,37 @@ def _insert_related_records(
                 r["pr_author"],
                 r["state"],
                 r["submitted_at"],
-            ),
-        )
-        add_participant(conn, pr_id, r["reviewer"], "reviewer")
+            )
+            for r in reviews.values()
+        ],
+    )
+
+    # Track commenters and reviewers as participants
+    commenters = {c["author"] for c in comments.values() if c["author"] != pr_author}
+    reviewers = {r["reviewer"] for r in reviews.values()}
+    add_participants(
+        conn,
+        [(pr_id, user, "commenter") for user in commenters]
+        + [(pr_id, user, "reviewer") for user in reviewers],
+    )
+
+
+def _add_existing_participant(
+    conn: sqlite3.Connection,
+    pr_id: int,
+    pr_number: int,
+    role: str | None,
+    user: str | None,
+    commit: bool,
+) -> None:
+    """Record user's role on an already collected PR."""
+    if not (role and user):
+        print(f"PR #{pr_number} already exists in database", file=sys.stderr)
+        return
+    add_participant(conn, pr_id, user, role.rstrip("ed"))
+    if commit:
+        conn.commit()
+    print(f"PR #{pr_number} already exists, added {user} as {role}", file=sys.stderr)
 
 
 def collect_pr(
@@ -404,58 +680,86 @@ def collect_pr(
     role: str | None = None,
     user: str | None = None,
     exclude_bots: bool = True,
+    *,
+    options: CollectOptions | None = None,
+    prefetched: dict[str, Any] | None = None,
+    fetches: PRFetches | None = None,
 ) -> bool:
-    """Collect PR data and create bundle."""
+    """Collect PR data and create bundle.
+
+    ``options`` holds the per-run settings (see ``CollectOptions``).
+    ``prefetched`` takes an entry from ``fetch_pr_batch``; anything it lacks
+    is fetched over REST. ``fetches`` takes requests already started by
+    ``start_pr_fetches``.
+    """
+    options = options or CollectOptions()
     repo_id = get_or_create_repo(conn, repo)
 
     existing_pr_id = get_pr_id(conn, repo_id, pr_number)
     if existing_pr_id:
-        if role and user:
-            add_participant(conn, existing_pr_id, user, role.rstrip("ed"))
-            conn.commit()
-            print(
-                f"PR #{pr_number} already exists, added {user} as {role}",
-                file=sys.stderr,
-            )
-        else:
-            print(f"PR #{pr_number} already exists in database", file=sys.stderr)
+        if fetches is not None:
+            fetches.cancel()
+        _add_existing_participant(
+            conn, existing_pr_id, pr_number, role, user, options.commit
+        )
         return True
 
     print(f"Fetching PR #{pr_number} from {repo}...", file=sys.stderr)
 
-    pr_data = gh_api(f"/repos/{repo}/pulls/{pr_number}")
+    if fetches is None:
+        fetches = start_pr_fetches(repo, pr_number, prefetched)
+
+    pr_data = fetches.pr.result()
     if not isinstance(pr_data, dict):
         print(f"Error: Could not fetch PR #{pr_number}", file=sys.stderr)
+        fetches.cancel()
         return False
 
     head_sha = pr_data.get("head", {}).get("sha", "")
     if not head_sha:
         print("Error: Could not determine head SHA", file=sys.stderr)
+        fetches.cancel()
         return False
 
     bundle_dir = get_pr_dir(repo, pr_number, base_dir)
     code_dir = bundle_dir / "code"
     diffs_dir = bundle_dir / "diffs"
-    code_dir.mkdir(parents=True, exist_ok=True)
-    diffs_dir.mkdir(parents=True, exist_ok=True)
-
     records = CollectedRecords()
-    records.files = _fetch_files(repo, pr_number, head_sha, code_dir, diffs_dir)
+    blobs = records.docs if options.docs_in_db else None
+    if blobs is None:
+        _ensure_bundle_dirs(bundle_dir, options.emit_files)
+
+    records.files = _fetch_files(
+        repo,
+        fetches.files.result(),
+        head_sha,
+        code_dir,
+        diffs_dir,
+        options.emit_files,
+        blobs,
+    )
 
     doc_counts, comment_records, review_records = save_docs(
-        bundle_dir, pr_data, repo, pr_number, exclude_bots
+        bundle_dir,
+        pr_data,
+        repo,
+        pr_number,
+        exclude_bots,
+        fetches=fetches.docs,
+        emit_files=options.emit_files,
+        blobs=blobs,
     )
     records.comments = comment_records
     records.reviews = review_records
 
     # Save metadata JSON
-    repo_slug = repo.replace("/", "_")
-    file_path = f"{repo_slug}/pr{pr_number}"
+    file_path = f"{bundle_dir.parent.name}/{bundle_dir.name}"
+    pr_author = (pr_data.get("user") or {}).get("login", "")
     meta = {
         "repo": repo,
         "pr_number": pr_number,
         "title": pr_data.get("title", ""),
-        "author": (pr_data.get("user") or {}).get("login", ""),
+        "author": pr_author,
         "state": pr_data.get("state", ""),
         "merged": pr_data.get("merged", False),
         "base_sha": pr_data.get("base", {}).get("sha", ""),
@@ -466,20 +770,27 @@ def collect_pr(
         "labels": [label.get("name", "") for label in pr_data.get("labels", [])],
         "url": pr_data.get("html_url", ""),
         "files": [f["file_path"] for f in records.files],
+        "bundle_names": {f["bundle_name"]: f["file_path"] for f in records.files},
         "doc_counts": doc_counts,
     }
-    (bundle_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+    _store_docs(
+        {bundle_dir: [("meta.json", json.dumps(meta, indent=2).encode())]},
+        bundle_dir,
+        blobs,
+    )
 
     # Insert into database
-    pr_id = _insert_pr_record(conn, repo_id, pr_number, pr_data, file_path)
-    pr_author = (pr_data.get("user") or {}).get("login", "")
+    pr_id = _insert_pr_record(
+        conn, repo_id, pr_number, meta, file_path, options.collected_at
+    )
 
     if role and user:
         participant_role = "author" if role == "authored" else "reviewer"
         add_participant(conn, pr_id, user, participant_role)
 
     _insert_related_records(conn, pr_id, pr_author, records)
-    conn.commit()
+    if options.commit:
+        conn.commit()
 
     print(
         f"Bundle created: {bundle_dir} "
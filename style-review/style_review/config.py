@@ -31,23 +31,33 @@ def get_db_path(base_dir: Path) -> Path:
     return base_dir / "style-review.db"
 
 
+def get_cache_path(base_dir: Path) -> Path:
+    """Get the SQLite path for cached GitHub API responses."""
+    return base_dir / "http-cache.db"
+
+
 def get_files_dir(base_dir: Path) -> Path:
     """Get the files directory for storing PR content."""
     return base_dir / "files"
 
 
+def get_repo_dir(repo: str, base_dir: Path) -> Path:
+    """Get the directory holding a repository's PR directories."""
+    repo_slug = repo.replace("/", "_")
+    return get_files_dir(base_dir) / repo_slug
+
+
 def get_pr_dir(repo: str, pr_number: int, base_dir: Path) -> Path:
     """Get the PR directory path.
 
     New structure: files/<owner_repo>/pr<N>/
     """
-    repo_slug = repo.replace("/", "_")
-    return get_files_dir(base_dir) / repo_slug / f"pr{pr_number}"
+    return get_repo_dir(repo, base_dir) / f"pr{pr_number}"
 
 
 def get_file_extension(path: str) -> str:
     """Get file extension for syntax highlighting."""
-    for ext, lang in EXT_MAP.items():
-        if path.endswith(ext):
-            return lang
-    return ""
+    dot = path.rfind(".")
+    if dot < 0:
+        return ""
+    return EXT_MAP.get(path[dot:], "")
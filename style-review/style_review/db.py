@@ -2,10 +2,21 @@
 
 from __future__ import annotations
 
+import json
+import re
 import sqlite3
+from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from .config import get_db_path
+from .config import get_cache_path, get_db_path
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+# Stored in PRAGMA user_version once SCHEMA is installed; bump it whenever
+# SCHEMA changes so existing databases pick up the new statements.
+SCHEMA_VERSION = 2
 
 # SQLite schema
 SCHEMA = """
@@ -79,6 +90,16 @@ CREATE TABLE IF NOT EXISTS reviews (
     UNIQUE(pr_id, github_id)
 );
 
+-- Bundle files kept in the database (collect --docs-in-db); kind is the
+-- directory inside the bundle ('.' for meta.json)
+CREATE TABLE IF NOT EXISTS doc_blobs (
+    pr_id INTEGER NOT NULL REFERENCES prs(id),
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    content BLOB NOT NULL,
+    PRIMARY KEY (pr_id, kind, name)
+);
+
 -- Indexes
 CREATE INDEX IF NOT EXISTS idx_prs_author ON prs(author);
 CREATE INDEX IF NOT EXISTS idx_prs_repo ON prs(repo_id);
@@ -91,32 +112,133 @@ CREATE INDEX IF NOT EXISTS idx_reviews_author ON reviews(pr_author);
 CREATE INDEX IF NOT EXISTS idx_reviews_pair ON reviews(reviewer, pr_author);
 """
 
+# Page cache for bulk loads in KiB (256 MiB), so index rebuilds sort in memory
+BULK_CACHE_SIZE_KIB = 262144
+
+# Secondary (non-UNIQUE) indexes; bulk_load_mode drops and rebuilds these
+_INDEX_STATEMENTS = re.findall(
+    r"^CREATE INDEX IF NOT EXISTS \w+ ON .+;$", SCHEMA, re.MULTILINE
+)
+
+# Insert statements shared by collection and migration. Keeping them as
+# constants lets executemany reuse one prepared statement per table.
+SQL_INSERT_PR = """INSERT INTO prs
+   (repo_id, number, title, author, state, merged, created_at, merged_at,
+    labels, url, file_path, collected_at)
+   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+# Migration assigns PR IDs itself so its rows can go through executemany
+SQL_INSERT_PR_WITH_ID = """INSERT INTO prs
+   (id, repo_id, number, title, author, state, merged, created_at, merged_at,
+    labels, url, file_path, collected_at)
+   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+SQL_INSERT_FILE = """INSERT OR IGNORE INTO pr_files
+   (pr_id, file_path, change_type, additions, deletions)
+   VALUES (?, ?, ?, ?, ?)"""
+
+SQL_INSERT_COMMENT = """INSERT OR IGNORE INTO comments
+   (pr_id, github_id, author, comment_type, file_path, line_number, created_at, is_bot)
+   VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+
+SQL_INSERT_REVIEW = """INSERT OR IGNORE INTO reviews
+   (pr_id, github_id, reviewer, pr_author, state, submitted_at)
+   VALUES (?, ?, ?, ?, ?, ?)"""
+
+SQL_INSERT_PARTICIPANT = (
+    "INSERT OR IGNORE INTO pr_participants (pr_id, user, role) VALUES (?, ?, ?)"
+)
+
+SQL_INSERT_DOC_BLOB = """INSERT OR REPLACE INTO doc_blobs
+   (pr_id, kind, name, content)
+   VALUES (?, ?, ?, ?)"""
+
+# Per-PR lookups, shared the same way so every caller hits one cached statement
+SQL_SELECT_REPO_ID = "SELECT id FROM repos WHERE owner = ? AND name = ?"
+
+SQL_INSERT_REPO = "INSERT INTO repos (owner, name) VALUES (?, ?)"
+
+SQL_SELECT_PR_ID = "SELECT id FROM prs WHERE repo_id = ? AND number = ?"
+
+# GitHub API response cache, kept in its own file so worker threads can write
+# to it while the main connection holds a collection transaction open.
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS etag_cache (
+    url TEXT PRIMARY KEY,
+    etag TEXT NOT NULL,
+    link TEXT,
+    body BLOB NOT NULL,
+    frozen INTEGER DEFAULT 0,
+    fetched_at TEXT NOT NULL
+);
+"""
+
 
 def get_db(base_dir: Path) -> sqlite3.Connection:
     """Get database connection, creating tables if needed."""
     db_path = get_db_path(base_dir)
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, cached_statements=256)
     conn.row_factory = sqlite3.Row
-    conn.executescript(SCHEMA)
+    # Single writer doing bulk ingestion: WAL with synchronous=NORMAL only
+    # fsyncs at checkpoints and keeps readers unblocked. A power loss can drop
+    # the last few commits but cannot corrupt the database; everything here
+    # can be re-collected from GitHub.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")  # KiB, i.e. 64 MiB
+    conn.execute("PRAGMA mmap_size=268435456")
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    if version < SCHEMA_VERSION:
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+@contextmanager
+def bulk_load_mode(conn: sqlite3.Connection) -> Iterator[None]:
+    """Drop the secondary indexes for a bulk load and rebuild them afterwards.
+
+    Building each index once over the loaded rows is cheaper than updating
+    it on every insert. user_version is cleared in the meantime, so if the
+    process dies before the rebuild, the next get_db reinstalls the schema.
+    The page cache is enlarged to BULK_CACHE_SIZE_KIB for the duration.
+    """
+    (cache_size,) = conn.execute("PRAGMA cache_size").fetchone()
+    conn.execute(f"PRAGMA cache_size = -{BULK_CACHE_SIZE_KIB}")
+    conn.execute("PRAGMA user_version = 0")
+    for statement in _INDEX_STATEMENTS:
+        conn.execute(f"DROP INDEX IF EXISTS {statement.split()[5]}")
+    try:
+        yield
+    finally:
+        for statement in _INDEX_STATEMENTS:
+            conn.execute(statement)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute(f"PRAGMA cache_size = {cache_size}")
+
+
+def get_cache_db(base_dir: Path) -> sqlite3.Connection:
+    """Get response cache connection (autocommit), creating the table if needed."""
+    cache_path = get_cache_path(base_dir)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(cache_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(CACHE_SCHEMA)
     return conn
 
 
 def get_or_create_repo(conn: sqlite3.Connection, repo: str) -> int:
     """Get or create repo entry, return repo_id."""
     owner, name = repo.split("/", 1)
-    cursor = conn.execute(
-        "SELECT id FROM repos WHERE owner = ? AND name = ?",
-        (owner, name),
-    )
+    cursor = conn.execute(SQL_SELECT_REPO_ID, (owner, name))
     row = cursor.fetchone()
     if row:
         return int(row["id"])
 
-    cursor = conn.execute(
-        "INSERT INTO repos (owner, name) VALUES (?, ?)",
-        (owner, name),
-    )
+    cursor = conn.execute(SQL_INSERT_REPO, (owner, name))
     repo_id = cursor.lastrowid
     assert repo_id is not None
     return repo_id
@@ -124,26 +246,43 @@ def get_or_create_repo(conn: sqlite3.Connection, repo: str) -> int:
 
 def pr_exists(conn: sqlite3.Connection, repo_id: int, pr_number: int) -> bool:
     """Check if PR already exists in database."""
-    cursor = conn.execute(
-        "SELECT 1 FROM prs WHERE repo_id = ? AND number = ?",
-        (repo_id, pr_number),
-    )
+    cursor = conn.execute(SQL_SELECT_PR_ID, (repo_id, pr_number))
     return cursor.fetchone() is not None
 
 
 def get_pr_id(conn: sqlite3.Connection, repo_id: int, pr_number: int) -> int | None:
     """Get PR ID from database."""
-    cursor = conn.execute(
-        "SELECT id FROM prs WHERE repo_id = ? AND number = ?",
-        (repo_id, pr_number),
-    )
+    cursor = conn.execute(SQL_SELECT_PR_ID, (repo_id, pr_number))
     row = cursor.fetchone()
     return int(row["id"]) if row else None
 
 
+def get_pr_ids(
+    conn: sqlite3.Connection, repo_id: int, pr_numbers: list[int]
+) -> dict[int, int]:
+    """Get PR IDs for the stored subset of pr_numbers, keyed by PR number."""
+    # One bound JSON array instead of a placeholder per number
+    cursor = conn.execute(
+        """SELECT number, id FROM prs
+           WHERE repo_id = ? AND number IN (SELECT value FROM json_each(?))""",
+        (repo_id, json.dumps(pr_numbers)),
+    )
+    return {row["number"]: row["id"] for row in cursor}
+
+
+def get_all_pr_ids(conn: sqlite3.Connection) -> dict[tuple[int, int], int]:
+    """Get the IDs of all stored PRs, keyed by (repo_id, number)."""
+    cursor = conn.execute("SELECT repo_id, number, id FROM prs")
+    return {(row["repo_id"], row["number"]): row["id"] for row in cursor}
+
+
 def add_participant(conn: sqlite3.Connection, pr_id: int, user: str, role: str) -> None:
     """Add participant to PR (idempotent)."""
-    conn.execute(
-        "INSERT OR IGNORE INTO pr_participants (pr_id, user, role) VALUES (?, ?, ?)",
-        (pr_id, user, role),
-    )
+    conn.execute(SQL_INSERT_PARTICIPANT, (pr_id, user, role))
+
+
+def add_participants(
+    conn: sqlite3.Connection, rows: Iterable[tuple[int, str, str]]
+) -> None:
+    """Add (pr_id, user, role) participant rows in one statement (idempotent)."""
+    conn.executemany(SQL_INSERT_PARTICIPANT, rows)
@@ -3,80 +3,597 @@
 from __future__ import annotations
 
 import base64
+import functools
+import http.client
 import json
+import os
 import re
 import subprocess
+import threading
+import zlib
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
-from typing import Any
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any
+from urllib.parse import quote, urlsplit
 
+from .db import get_cache_db
 
-def gh_api(endpoint: str) -> dict[str, Any] | list[dict[str, Any]] | None:
-    """Call GitHub API via gh CLI."""
+if TYPE_CHECKING:
+    import sqlite3
+    from collections.abc import Callable
+    from pathlib import Path
+
+# orjson is optional and several times faster on large API payloads; its
+# decode error subclasses json.JSONDecodeError, so error handling is unchanged.
+_json_loads: Callable[[bytes | str], Any]
+try:
+    from orjson import loads as _orjson_loads
+except ImportError:
+    _json_loads = json.loads
+else:
+    _json_loads = _orjson_loads
+
+# Hosts other than github.com (GitHub Enterprise Server) serve the REST API
+# under /api/v3 and GraphQL at /api/graphql, as gh does for GH_HOST.
+DEFAULT_HOST = "github.com"
+
+# Redirect hops followed per request (GitHub redirects renamed repositories)
+MAX_REDIRECTS = 5
+
+_NEXT_LINK = re.compile(r'<([^>]+)>;\s*rel="next"')
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_RELATIVE_DATE = re.compile(r"^(\d+)([ymd])$")
+
+# One keep-alive connection per worker thread; http.client is not thread-safe.
+_local = threading.local()
+
+
+class GitHubError(RuntimeError):
+    """The API cannot be used: no credentials, bad credentials, or rate limited."""
+
+
+@functools.cache
+def _host() -> str:
+    """The GitHub host to talk to, from GH_HOST like the gh CLI."""
+    return os.environ.get("GH_HOST") or DEFAULT_HOST
+
+
+@functools.cache
+def _api_host() -> str:
+    """The host name serving the API for ``_host()``."""
+    host = _host()
+    return "api.github.com" if host == DEFAULT_HOST else host
+
+
+def _api_prefix() -> str:
+    """Path prefix of REST endpoints on the API host."""
+    return "" if _host() == DEFAULT_HOST else "/api/v3"
+
+
+def _graphql_path() -> str:
+    """Path of the GraphQL endpoint on the API host."""
+    return "/graphql" if _host() == DEFAULT_HOST else "/api/graphql"
+
+
+@functools.cache
+def _auth_token() -> str:
+    """Resolve the GitHub token once: environment first, then gh's stored login.
+
+    Raises GitHubError when neither has a token for the host.
+    """
+    host = _host()
+    names = (
+        ("GH_TOKEN", "GITHUB_TOKEN")
+        if host == DEFAULT_HOST
+        else ("GH_ENTERPRISE_TOKEN", "GITHUB_ENTERPRISE_TOKEN")
+    )
+    for name in names:
+        token = os.environ.get(name)
+        if token:
+            return token
     try:
         result = subprocess.run(
-            ["gh", "api", endpoint],
+            ["gh", "auth", "token", "--hostname", host],
             capture_output=True,
             text=True,
             check=True,
         )
-        data: dict[str, Any] | list[dict[str, Any]] = json.loads(result.stdout)
-    except (subprocess.CalledProcessError, json.JSONDecodeError):
+    except (OSError, subprocess.CalledProcessError):
+        result = None
+    token = result.stdout.strip() if result is not None else ""
+    if not token:
+        msg = f"No GitHub token for {host}: set {names[0]} or run `gh auth login`"
+        raise GitHubError(msg)
+    return token
+
+
+def _request_headers() -> dict[str, str]:
+    """Headers sent with every API request."""
+    return {
+        "Accept": "application/vnd.github+json",
+        "Authorization": f"Bearer {_auth_token()}",
+        "User-Agent": "style-review",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+
+
+def _check_access(status: int, headers: http.client.HTTPMessage) -> None:
+    """Raise GitHubError for responses no later request can succeed after.
+
+    That is rejected credentials and exhausted rate limits; other errors,
+    such as a 403 for a private repository, are left to the caller.
+    """
+    if status == HTTPStatus.UNAUTHORIZED:
+        msg = f"GitHub rejected the token for {_host()} (401 Bad credentials)"
+        raise GitHubError(msg)
+    if status == HTTPStatus.TOO_MANY_REQUESTS or (
+        status == HTTPStatus.FORBIDDEN
+        and (headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in headers)
+    ):
+        reset = headers.get("X-RateLimit-Reset")
+        when = (
+            datetime.fromtimestamp(int(reset), UTC).isoformat()
+            if reset and reset.isdigit()
+            else "later"
+        )
+        msg = f"GitHub API rate limit exceeded ({status}); retry after {when}"
+        raise GitHubError(msg)
+
+
+def _connection() -> http.client.HTTPSConnection:
+    """Return this thread's persistent connection to the API host."""
+    conn: http.client.HTTPSConnection | None = getattr(_local, "conn", None)
+    if conn is None:
+        conn = http.client.HTTPSConnection(_api_host(), timeout=30)
+        _local.conn = conn
+    return conn
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A cached API response body with its validator."""
+
+    etag: str
+    link: str | None
+    body: bytes
+    frozen: bool
+
+
+def _cacheable(path: str) -> bool:
+    """Whether responses for an API path are worth caching.
+
+    File contents are fetched once per file and commit and would never be
+    revalidated, so caching them only grows the cache; PR, list and comment
+    endpoints are requested again on every collect.
+    """
+    return "/contents/" not in path.partition("?")[0]
+
+
+class ResponseCache:
+    """ETag cache of API responses, disabled until ``open`` is called."""
+
+    def __init__(self) -> None:
+        self.base_dir: Path | None = None
+        self._local = threading.local()
+
+    def open(self, base_dir: Path) -> None:
+        """Start caching responses in the data directory."""
+        self.base_dir = base_dir
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection | None:
+        if self.base_dir is None:
+            return None
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = get_cache_db(self.base_dir)
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, path: str) -> CachedResponse | None:
+        """Return the cached response for an API path, if any."""
+        conn = self._conn()
+        if conn is None or not _cacheable(path):
+            return None
+        row = conn.execute(
+            "SELECT etag, link, body, frozen FROM etag_cache WHERE url = ?",
+            (path,),
+        ).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(row[0], row[1], zlib.decompress(row[2]), bool(row[3]))
+
+    def store(self, path: str, etag: str, link: str | None, body: bytes) -> None:
+        """Remember a 200 response and its ETag, unless its path is not cached."""
+        conn = self._conn()
+        if conn is None or not _cacheable(path):
+            return
+        conn.execute(
+            """INSERT OR REPLACE INTO etag_cache
+               (url, etag, link, body, frozen, fetched_at)
+               VALUES (?, ?, ?, ?, 0, ?)""",
+            (path, etag, link, zlib.compress(body), datetime.now(UTC).isoformat()),
+        )
+
+    def freeze(self, path: str) -> None:
+        """Serve this path from the cache from now on without revalidating."""
+        conn = self._conn()
+        if conn is None:
+            return
+        conn.execute("UPDATE etag_cache SET frozen = 1 WHERE url = ?", (path,))
+
+
+_response_cache = ResponseCache()
+
+
+def enable_response_cache(base_dir: Path) -> None:
+    """Cache API responses under base_dir and revalidate them with ETags."""
+    _response_cache.open(base_dir)
+
+
+def _send(
+    path: str, headers: dict[str, str], body: bytes | None = None
+) -> tuple[int, http.client.HTTPMessage, bytes]:
+    """Issue one request on this thread's connection and read the whole response.
+
+    Sends a POST when a body is given, a GET otherwise.
+    """
+    conn = _connection()
+    try:
+        conn.request("GET" if body is None else "POST", path, body, headers)
+        response = conn.getresponse()
+        return response.status, response.headers, response.read()
+    except (http.client.HTTPException, OSError):
+        conn.close()
+        _local.conn = None
+        raise
+
+
+def _api_path(endpoint: str) -> str:
+    """Normalize an endpoint into a request path on the API host."""
+    return _api_prefix() + quote(
+        endpoint if endpoint.startswith("/") else f"/{endpoint}", safe="/?&=%:@+,;~"
+    )
+
+
+def _url_path(url: str) -> str:
+    """The path and query of a URL, for requesting it on the API connection."""
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+_REDIRECTS = frozenset(
+    {
+        HTTPStatus.MOVED_PERMANENTLY,
+        HTTPStatus.FOUND,
+        HTTPStatus.TEMPORARY_REDIRECT,
+        HTTPStatus.PERMANENT_REDIRECT,
+    }
+)
+
+
+def _get(path: str) -> tuple[int, str | None, bytes]:
+    """GET an API path. Returns status, Link header, and body.
+
+    Cached responses are revalidated with If-None-Match; a 304 is answered
+    from the cache as a 200. Frozen entries skip the request entirely.
+    Redirects are followed on the API host. Raises GitHubError when the token
+    is missing or rejected, or the rate limit is exhausted.
+    """
+    cached = _response_cache.lookup(path)
+    if cached is not None and cached.frozen:
+        return HTTPStatus.OK, cached.link, cached.body
+
+    headers = _request_headers()
+    if cached is not None:
+        headers["If-None-Match"] = cached.etag
+    target = path
+    for _ in range(MAX_REDIRECTS + 1):
+        try:
+            status, response_headers, body = _send(target, headers)
+        except (http.client.HTTPException, OSError):
+            # The kept-alive socket may have gone stale; retry on a fresh one.
+            status, response_headers, body = _send(target, headers)
+        _check_access(status, response_headers)
+        location = response_headers.get("Location")
+        if status not in _REDIRECTS or not location:
+            break
+        target = _url_path(location)
+
+    if status == HTTPStatus.NOT_MODIFIED and cached is not None:
+        return HTTPStatus.OK, cached.link, cached.body
+    link = response_headers.get("Link")
+    etag = response_headers.get("ETag")
+    if status == HTTPStatus.OK and etag:
+        _response_cache.store(path, etag, link, body)
+    return status, link, body
+
+
+def _is_final_pr(data: object) -> bool:
+    """Whether data is a merged pull request, which no longer changes."""
+    return (
+        isinstance(data, dict)
+        and "head" in data
+        and data.get("state") == "closed"
+        and bool(data.get("merged_at"))
+    )
+
+
+def gh_api(endpoint: str) -> dict[str, Any] | list[dict[str, Any]] | None:
+    """Call GitHub API with the gh CLI's credentials."""
+    path = _api_path(endpoint)
+    try:
+        status, _, body = _get(path)
+        if status != HTTPStatus.OK:
+            return None
+        data: dict[str, Any] | list[dict[str, Any]] = _json_loads(body)
+    except (http.client.HTTPException, OSError, json.JSONDecodeError):
         return None
+    if _is_final_pr(data):
+        _response_cache.freeze(path)
     return data
 
 
 def gh_api_paginate(endpoint: str) -> list[dict[str, Any]]:
-    """Call GitHub API with pagination."""
-    try:
-        result = subprocess.run(
-            ["gh", "api", "--paginate", endpoint],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-    except subprocess.CalledProcessError:
-        return []
+    """Call GitHub API with pagination, following Link rel="next" headers."""
+    if "per_page=" not in endpoint:
+        endpoint += "&per_page=100" if "?" in endpoint else "?per_page=100"
+    path = _api_path(endpoint)
     items: list[dict[str, Any]] = []
-    for line in result.stdout.strip().split("\n"):
-        if line:
-            try:
-                data = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            if isinstance(data, list):
-                items.extend(data)
-            elif isinstance(data, dict):
-                items.append(data)
+    while True:
+        try:
+            status, link, body = _get(path)
+        except (http.client.HTTPException, OSError):
+            return []
+        if status != HTTPStatus.OK:
+            return []
+        try:
+            data = _json_loads(body)
+        except json.JSONDecodeError:
+            data = None
+        if isinstance(data, list):
+            items.extend(data)
+        elif isinstance(data, dict):
+            items.append(data)
+
+        match = _NEXT_LINK.search(link or "")
+        if match is None:
+            break
+        path = _url_path(match.group(1))
     return items
 
 
+def gh_graphql(query: str, variables: dict[str, Any]) -> dict[str, Any] | None:
+    """Run a GraphQL query. Returns its data, or None on failure.
+
+    Partial results are returned as-is; nodes that failed resolve to None.
+    Raises GitHubError like ``_get``.
+    """
+    payload = json.dumps({"query": query, "variables": variables}).encode()
+    headers = _request_headers()
+    headers["Content-Type"] = "application/json"
+    path = _graphql_path()
+    try:
+        try:
+            status, response_headers, body = _send(path, headers, payload)
+        except (http.client.HTTPException, OSError):
+            status, response_headers, body = _send(path, headers, payload)
+        _check_access(status, response_headers)
+        if status != HTTPStatus.OK:
+            return None
+        result = _json_loads(body)
+    except (http.client.HTTPException, OSError, json.JSONDecodeError):
+        return None
+    data = result.get("data") if isinstance(result, dict) else None
+    return data if isinstance(data, dict) else None
+
+
+_PR_FIELDS = """
+fragment PRFields on PullRequest {
+  number title body state merged mergedAt createdAt url
+  headRefOid baseRefOid mergeCommit { oid }
+  author { __typename login }
+  labels(first: 100) { pageInfo { hasNextPage } nodes { name } }
+  reviews(first: 100) {
+    pageInfo { hasNextPage }
+    nodes { databaseId state body submittedAt author { __typename login } }
+  }
+  comments(first: 100) {
+    pageInfo { hasNextPage }
+    nodes { databaseId body createdAt author { __typename login } }
+  }
+}
+"""
+
+
+def _rest_user(author: dict[str, Any] | None) -> dict[str, Any] | None:
+    """Convert a GraphQL actor to the REST user shape (bots get their [bot] suffix)."""
+    if author is None:
+        return None
+    kind = author.get("__typename", "User")
+    login = author.get("login", "")
+    if kind == "Bot":
+        login = f"{login}[bot]"
+    return {"login": login, "type": kind}
+
+
+def _rest_pr(node: dict[str, Any]) -> dict[str, Any]:
+    """Convert a PRFields node to the fields read from REST /pulls/N."""
+    return {
+        "number": node["number"],
+        "title": node.get("title", ""),
+        "body": node.get("body"),
+        "user": _rest_user(node.get("author")),
+        "state": "open" if node.get("state") == "OPEN" else "closed",
+        "merged": node.get("merged", False),
+        "merged_at": node.get("mergedAt"),
+        "created_at": node.get("createdAt", ""),
+        "labels": [{"name": label["name"]} for label in node["labels"]["nodes"]],
+        "html_url": node.get("url", ""),
+        "head": {"sha": node.get("headRefOid", "")},
+        "base": {"sha": node.get("baseRefOid", "")},
+        "merge_commit_sha": (node.get("mergeCommit") or {}).get("oid"),
+    }
+
+
+def fetch_pr_batch(repo: str, pr_numbers: list[int]) -> dict[int, dict[str, Any]]:
+    """Fetch metadata, reviews, and discussion for several PRs in one query.
+
+    Returns ``{number: {"pr": ..., "reviews": [...], "discussion": [...]}}`` in
+    REST response shapes. Connections with more than 100 nodes are left out so
+    the caller falls back to paginated REST for them; PRs the query could not
+    resolve are missing entirely.
+    """
+    if not pr_numbers:
+        return {}
+    owner, name = repo.split("/", 1)
+    selections = "\n".join(
+        f"  pr{number}: pullRequest(number: {number}) {{ ...PRFields }}"
+        for number in pr_numbers
+    )
+    query = (
+        "query($owner: String!, $name: String!) {\n"
+        f" repository(owner: $owner, name: $name) {{\n{selections}\n }}\n}}\n"
+        f"{_PR_FIELDS}"
+    )
+    data = gh_graphql(query, {"owner": owner, "name": name})
+    repository = (data or {}).get("repository") or {}
+
+    prefetched: dict[int, dict[str, Any]] = {}
+    for number in pr_numbers:
+        node = repository.get(f"pr{number}")
+        if not node or node["labels"]["pageInfo"]["hasNextPage"]:
+            continue
+        entry: dict[str, Any] = {"pr": _rest_pr(node)}
+        if not node["reviews"]["pageInfo"]["hasNextPage"]:
+            entry["reviews"] = [
+                {
+                    "id": review.get("databaseId") or 0,
+                    "user": _rest_user(review.get("author")),
+                    "state": review.get("state", ""),
+                    "body": review.get("body") or "",
+                    "submitted_at": review.get("submittedAt"),
+                }
+                for review in node["reviews"]["nodes"]
+            ]
+        if not node["comments"]["pageInfo"]["hasNextPage"]:
+            entry["discussion"] = [
+                {
+                    "id": comment.get("databaseId") or 0,
+                    "user": _rest_user(comment.get("author")),
+                    "created_at": comment.get("createdAt", ""),
+                    "body": comment.get("body", ""),
+                }
+                for comment in node["comments"]["nodes"]
+            ]
+        prefetched[number] = entry
+    return prefetched
+
+
+# Leading bytes searched for a NUL to recognise binary files (as git does)
+_BINARY_SNIFF_BYTES = 8000
+
+
 def decode_base64_content(
     data: dict[str, Any] | list[dict[str, Any]] | None,
-) -> str | None:
-    """Decode base64 content from GitHub API response."""
+) -> bytes | None:
+    """Decode base64 content from GitHub API response to raw bytes.
+
+    Returns None for binary files, recognised like git does by a NUL byte.
+    """
     if not isinstance(data, dict):
         return None
     content = data.get("content")
     if not isinstance(content, str):
         return None
     try:
-        decoded = base64.b64decode(content).decode("utf-8")
-    except (ValueError, UnicodeDecodeError):
+        # Non-alphabet characters (the API's line breaks) are skipped
+        decoded = base64.b64decode(content)
+    except ValueError:
+        return None
+    if b"\0" in decoded[:_BINARY_SNIFF_BYTES]:
         return None
     return decoded
 
 
-def get_file_at_ref(repo: str, path: str, ref: str) -> str | None:
+def get_file_at_ref(repo: str, path: str, ref: str) -> bytes | None:
     """Get file content at a specific git ref (commit, branch, tag)."""
     data = gh_api(f"/repos/{repo}/contents/{path}?ref={ref}")
     return decode_base64_content(data)
 
 
+# Files per GraphQL contents query
+_BLOBS_PER_QUERY = 100
+
+_BLOB_FIELDS = """
+fragment BlobFields on Blob { text isBinary isTruncated byteSize }
+"""
+
+
+def get_files_at_ref(repo: str, paths: list[str], ref: str) -> dict[str, bytes | None]:
+    """Get several files at a git ref with one GraphQL query per 100 paths.
+
+    Files whose complete text came back map to their content and binary files
+    map to None. Truncated or unresolved files are left out for
+    ``get_file_at_ref``. So is text that is not exactly the blob's bytes:
+    text whose UTF-8 size differs from the blob, and text containing U+FFFD.
+    An invalid 3-byte sequence decodes to one U+FFFD, which is also 3 bytes
+    long, so the size check alone would let it through.
+    """
+    owner, name = repo.split("/", 1)
+    contents: dict[str, bytes | None] = {}
+    for start in range(0, len(paths), _BLOBS_PER_QUERY):
+        batch = paths[start : start + _BLOBS_PER_QUERY]
+        params = "".join(f", $f{i}: String!" for i in range(len(batch)))
+        selections = "\n".join(
+            f"  f{i}: object(expression: $f{i}) {{ ...BlobFields }}"
+            for i in range(len(batch))
+        )
+        query = (
+            f"query($owner: String!, $name: String!{params}) {{\n"
+            f" repository(owner: $owner, name: $name) {{\n{selections}\n }}\n}}\n"
+            f"{_BLOB_FIELDS}"
+        )
+        variables = {"owner": owner, "name": name}
+        variables.update({f"f{i}": f"{ref}:{path}" for i, path in enumerate(batch)})
+        data = gh_graphql(query, variables)
+        repository = (data or {}).get("repository") or {}
+
+        for i, path in enumerate(batch):
+            blob = repository.get(f"f{i}")
+            if not blob or blob.get("isTruncated"):
+                continue
+            if blob.get("isBinary"):
+                contents[path] = None
+                continue
+            text = blob.get("text")
+            if not isinstance(text, str) or "\ufffd" in text:
+                continue
+            content = text.encode()
+            if len(content) == blob.get("byteSize"):
+                contents[path] = content
+    return contents
+
+
+# Logins already classified during this run
+_HUMAN_LOGINS: set[str] = set()
+_BOT_LOGINS: set[str] = set()
+
+
 def is_bot(user: dict[str, Any] | None) -> bool:
     """Check if user is a bot account."""
     if user is None:
         return False
-    return user.get("type") == "Bot" or user.get("login", "").endswith("[bot]")
+    login = user.get("login", "")
+    if login in _HUMAN_LOGINS:
+        return False
+    if login in _BOT_LOGINS:
+        return True
+    bot = user.get("type") == "Bot" or login.endswith("[bot]")
+    if login:
+        (_BOT_LOGINS if bot else _HUMAN_LOGINS).add(login)
+    return bot
 
 
 def parse_since(since: str | None) -> str | None:
@@ -84,10 +601,10 @@ def parse_since(since: str | None) -> str | None:
     if not since:
         return None
 
-    if re.match(r"^\d{4}-\d{2}-\d{2}$", since):
+    if _ISO_DATE.match(since):
         return since
 
-    match = re.match(r"^(\d+)([ymd])$", since)
+    match = _RELATIVE_DATE.match(since)
     if match:
         num = int(match.group(1))
         unit = match.group(2)
@@ -134,8 +651,8 @@ def list_authored_prs(
         cmd.extend(["--created", f">={since_date}"])
 
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
+        result = subprocess.run(cmd, capture_output=True, check=True)
+        data = _json_loads(result.stdout)
     except (subprocess.CalledProcessError, json.JSONDecodeError):
         return []
 
@@ -173,8 +690,8 @@ def list_reviewed_prs(
         cmd.extend(["--created", f">={since_date}"])
 
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
+        result = subprocess.run(cmd, capture_output=True, check=True)
+        data = _json_loads(result.stdout)
     except (subprocess.CalledProcessError, json.JSONDecodeError):
         return []
 
@@ -2,17 +2,37 @@
 
 from __future__ import annotations
 
+import errno
+import functools
+import itertools
 import json
+import os
 import shutil
 import sqlite3
 import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
-from .config import get_pr_dir
-from .db import add_participant, get_or_create_repo, get_pr_id, pr_exists
+from .config import get_repo_dir
+from .db import (
+    SQL_INSERT_FILE,
+    SQL_INSERT_PR_WITH_ID,
+    add_participants,
+    get_all_pr_ids,
+    get_or_create_repo,
+)
+
+# Migrated PRs per transaction
+MIGRATE_COMMIT_EVERY = 500
+
+# Threads reading meta.json files ahead of the migration loop, and how many
+# PRs they may run ahead of it
+META_WORKERS = 8
+META_READ_AHEAD = 64
 
 
 @dataclass
@@ -23,68 +43,150 @@ class MigrationState:
     skipped: int = 0
     errors: int = 0
     seen_prs: dict[tuple[str, int], Path] = field(default_factory=dict)
-
-
-def _read_pr_meta(pr_dir: Path) -> dict[str, Any] | None:
-    """Read and validate PR metadata from directory."""
-    meta_path = pr_dir / "meta.json"
-    if not meta_path.exists():
-        print(f"  Skipping (no meta.json): {pr_dir}", file=sys.stderr)
-        return None
-
+    # Old directories to delete once the database changes are committed
+    to_delete: list[Path] = field(default_factory=list)
+    # (old, new) PR directories to move once their rows are committed, so a
+    # failed run leaves them in the old tree where a rerun finds them again
+    to_move: list[tuple[Path, Path]] = field(default_factory=list)
+    # New repo directories by "owner/name", created on first use
+    repo_dirs: dict[str, Path] = field(default_factory=dict)
+    # repos.id by "owner/name", filled on first use
+    repo_ids: dict[str, int] = field(default_factory=dict)
+    # prs.id by (repo_id, number), loaded on first use
+    pr_ids: dict[tuple[int, int], int] | None = None
+    # ID for the next PR inserted by this run, set when pr_ids is loaded
+    next_pr_id: int = 0
+    # collected_at for every PR inserted by this run
+    migrated_at: str = field(default_factory=lambda: datetime.now(UTC).isoformat())
+    # Rows written in bulk before each commit: prs, pr_files, pr_participants
+    prs: list[tuple[Any, ...]] = field(default_factory=list)
+    files: list[tuple[int, str, str | None, int, int]] = field(default_factory=list)
+    participants: list[tuple[int, str, str]] = field(default_factory=list)
+    # Per-PR progress lines, written to stderr in one call at each commit
+    log: list[str] = field(default_factory=list)
+
+    def repo_id(self, conn: sqlite3.Connection, repo: str) -> int:
+        """Get the repo ID, looking it up in the database only once per run."""
+        repo_id = self.repo_ids.get(repo)
+        if repo_id is None:
+            repo_id = self.repo_ids[repo] = get_or_create_repo(conn, repo)
+        return repo_id
+
+    def repo_dir(self, base_dir: Path, repo: str) -> Path:
+        """Get the repo's new directory, creating it only once per run."""
+        repo_dir = self.repo_dirs.get(repo)
+        if repo_dir is None:
+            repo_dir = self.repo_dirs[repo] = get_repo_dir(repo, base_dir)
+            repo_dir.mkdir(parents=True, exist_ok=True)
+        return repo_dir
+
+    def pr_id(
+        self, conn: sqlite3.Connection, repo_id: int, pr_number: int
+    ) -> int | None:
+        """Get a stored PR's ID; all IDs are loaded in one query on first use."""
+        if self.pr_ids is None:
+            self.pr_ids = get_all_pr_ids(conn)
+            self.next_pr_id = max(self.pr_ids.values(), default=0) + 1
+        return self.pr_ids.get((repo_id, pr_number))
+
+    def new_pr_id(self, repo_id: int, pr_number: int) -> int:
+        """Assign the next free PR ID to a PR inserted during this run."""
+        assert self.pr_ids is not None
+        pr_id = self.next_pr_id
+        self.next_pr_id += 1
+        self.pr_ids[repo_id, pr_number] = pr_id
+        return pr_id
+
+    def note(self, message: str) -> None:
+        """Queue a progress line for the next commit."""
+        self.log.append(f"{message}\n")
+
+    def commit(self, conn: sqlite3.Connection) -> None:
+        """Commit the buffered rows, then move their directories; write the log."""
+        conn.executemany(SQL_INSERT_PR_WITH_ID, self.prs)
+        conn.executemany(SQL_INSERT_FILE, self.files)
+        add_participants(conn, self.participants)
+        conn.commit()
+        self.prs.clear()
+        self.files.clear()
+        self.participants.clear()
+        for old_path, new_path in self.to_move:
+            _move_dir(old_path, new_path)
+        self.to_move.clear()
+        sys.stderr.write("".join(self.log))
+        self.log.clear()
+
+
+def _read_pr_meta(pr_dir: Path) -> dict[str, Any] | str:
+    """Read and validate PR metadata from directory.
+
+    Returns the metadata, or the reason the directory should be skipped.
+    Does no printing or database work, so it can run in a worker thread.
+    """
     try:
-        meta: dict[str, Any] = json.loads(meta_path.read_text())
+        # Bytes go straight to the parser; a missing file needs no extra stat
+        meta: dict[str, Any] = json.loads((pr_dir / "meta.json").read_bytes())
+    except FileNotFoundError:
+        return "no meta.json"
     except json.JSONDecodeError:
-        print(f"  Skipping (invalid meta.json): {pr_dir}", file=sys.stderr)
-        return None
+        return "invalid meta.json"
 
     if not meta.get("repo") or not meta.get("pr_number"):
-        print(f"  Skipping (missing repo/pr_number): {pr_dir}", file=sys.stderr)
-        return None
+        return "missing repo/pr_number"
 
     return meta
 
 
+def _add_bundle_names(pr_dir: Path, meta: dict[str, Any]) -> None:
+    """Record in meta.json how an old bundle named its code and diff files.
+
+    Bundles from before bundle_names keep their flattened names ("/" replaced
+    by "__"); writing the mapping lets readers find files in old and new
+    bundles alike. The file is replaced atomically, so a crash leaves either
+    version in place.
+    """
+    if "bundle_names" in meta:
+        return
+    paths = (
+        entry if isinstance(entry, str) else entry.get("path", "")
+        for entry in meta.get("files", [])
+        if isinstance(entry, (str, dict))
+    )
+    meta["bundle_names"] = {path.replace("/", "__"): path for path in paths if path}
+    tmp = pr_dir / "meta.json.tmp"
+    tmp.write_text(json.dumps(meta, indent=2))
+    tmp.replace(pr_dir / "meta.json")
+
+
 def _merge_duplicate(
-    conn: sqlite3.Connection,
+    state: MigrationState,
     pr_dir: Path,
-    repo: str,
-    pr_number: int,
+    pr_id: int | None,
     existing_path: Path,
     role: str,
     user: str,
 ) -> None:
     """Merge duplicate PR directory into existing one."""
-    repo_id = get_or_create_repo(conn, repo)
-    pr_id = get_pr_id(conn, repo_id, pr_number)
     if pr_id:
         participant_role = "author" if role == "authored" else "reviewer"
-        add_participant(conn, pr_id, user, participant_role)
-        conn.commit()
+        state.participants.append((pr_id, user, participant_role))
 
-    shutil.rmtree(pr_dir)
-    print(f"  Merged duplicate: {pr_dir} -> {existing_path}", file=sys.stderr)
+    state.note(f"  Merged duplicate: {pr_dir} -> {existing_path}")
 
 
 def _insert_migrated_pr(
-    conn: sqlite3.Connection,
+    state: MigrationState,
     meta: dict[str, Any],
-    repo: str,
+    repo_id: int,
     pr_number: int,
-) -> int | None:
-    """Insert migrated PR into database. Returns new PR ID or None."""
-    repo_id = get_or_create_repo(conn, repo)
-
-    if pr_exists(conn, repo_id, pr_number):
-        return get_pr_id(conn, repo_id, pr_number)
-
+    file_path: str,
+) -> int:
+    """Queue migrated PR for insertion at the next commit. Returns new PR ID."""
     pr_author = meta.get("author", "")
-    cursor = conn.execute(
-        """INSERT INTO prs
-           (repo_id, number, title, author, state, merged, created_at, merged_at,
-            labels, url, file_path, collected_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    new_pr_id = state.new_pr_id(repo_id, pr_number)
+    state.prs.append(
         (
+            new_pr_id,
             repo_id,
             pr_number,
             meta.get("title", ""),
@@ -95,49 +197,51 @@ def _insert_migrated_pr(
             meta.get("merged_at"),
             json.dumps(meta.get("labels", [])),
             meta.get("url", ""),
-            f"{repo.replace('/', '_')}/pr{pr_number}",
-            datetime.now(UTC).isoformat(),
-        ),
+            file_path,
+            state.migrated_at,
+        )
     )
-    new_pr_id = cursor.lastrowid
-    assert new_pr_id is not None
 
     if pr_author:
-        add_participant(conn, new_pr_id, pr_author, "author")
+        state.participants.append((new_pr_id, pr_author, "author"))
 
-    _insert_pr_files(conn, new_pr_id, meta.get("files", []))
-    conn.commit()
+    _insert_pr_files(state, new_pr_id, meta.get("files", []))
 
     return new_pr_id
 
 
 def _insert_pr_files(
-    conn: sqlite3.Connection,
+    state: MigrationState,
     pr_id: int,
     files: list[str | dict[str, Any]],
 ) -> None:
-    """Insert PR files into database."""
+    """Queue PR files for insertion at the next commit."""
+    rows = state.files
     for file_path in files:
         if isinstance(file_path, str):
-            conn.execute(
-                "INSERT OR IGNORE INTO pr_files (pr_id, file_path) VALUES (?, ?)",
-                (pr_id, file_path),
-            )
+            rows.append((pr_id, file_path, None, 0, 0))
         elif isinstance(file_path, dict):
-            conn.execute(
-                """INSERT OR IGNORE INTO pr_files
-                   (pr_id, file_path, change_type, additions, deletions)
-                   VALUES (?, ?, ?, ?, ?)""",
+            rows.append(
                 (
                     pr_id,
                     file_path.get("path", ""),
                     file_path.get("status"),
                     file_path.get("additions", 0),
                     file_path.get("deletions", 0),
-                ),
+                )
             )
 
 
+def _move_dir(src: Path, dst: Path) -> None:
+    """Move a directory, renaming in place unless it crosses filesystems."""
+    try:
+        src.rename(dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src, dst)
+
+
 def migrate_pr_dir(
     conn: sqlite3.Connection,
     base_dir: Path,
@@ -145,51 +249,123 @@ def migrate_pr_dir(
     role: str,
     user: str,
     state: MigrationState,
+    meta: dict[str, Any] | str | None = None,
 ) -> bool:
-    """Migrate a single PR directory."""
-    meta = _read_pr_meta(pr_dir)
+    """Migrate a single PR directory.
+
+    meta is the result of _read_pr_meta when it was already read ahead.
+    """
     if meta is None:
+        meta = _read_pr_meta(pr_dir)
+    if isinstance(meta, str):
+        state.note(f"  Skipping ({meta}): {pr_dir}")
         state.errors += 1
         return False
 
     repo = meta["repo"]
     pr_number = meta["pr_number"]
     key = (repo, pr_number)
+    repo_id = state.repo_id(conn, repo)
+    pr_id = state.pr_id(conn, repo_id, pr_number)
 
     # Check for duplicate
     if key in state.seen_prs:
-        _merge_duplicate(conn, pr_dir, repo, pr_number, state.seen_prs[key], role, user)
+        _merge_duplicate(state, pr_dir, pr_id, state.seen_prs[key], role, user)
+        state.to_delete.append(pr_dir)
         state.skipped += 1
         return True
 
-    new_path = get_pr_dir(repo, pr_number, base_dir)
+    repo_dir = state.repo_dir(base_dir, repo)
+    new_path = repo_dir / f"pr{pr_number}"
+    # Same "<owner_repo>/pr<N>" value the collector stores in prs.file_path
+    file_path = f"{repo_dir.name}/{new_path.name}"
 
-    # Already exists in new location
+    # Already exists in new location, e.g. collected after the old layout was
+    # written; make sure the PR row exists too.
     if new_path.exists():
-        shutil.rmtree(pr_dir)
+        if pr_id is None:
+            pr_id = _insert_migrated_pr(state, meta, repo_id, pr_number, file_path)
+        state.to_delete.append(pr_dir)
         state.seen_prs[key] = new_path
         state.skipped += 1
         return True
 
-    # Move to new location
-    new_path.parent.mkdir(parents=True, exist_ok=True)
-    shutil.move(str(pr_dir), str(new_path))
+    # Move to new location once the batch is committed
+    _add_bundle_names(pr_dir, meta)
+    state.to_move.append((pr_dir, new_path))
     state.seen_prs[key] = new_path
 
     # Insert into database
-    pr_id = _insert_migrated_pr(conn, meta, repo, pr_number)
+    if pr_id is None:
+        pr_id = _insert_migrated_pr(state, meta, repo_id, pr_number, file_path)
 
     # Add role participant
     if pr_id:
         participant_role = "author" if role == "authored" else "reviewer"
-        add_participant(conn, pr_id, user, participant_role)
-        conn.commit()
+        state.participants.append((pr_id, user, participant_role))
 
-    print(f"  Migrated: {pr_dir} -> {new_path}", file=sys.stderr)
+    state.note(f"  Migrated: {pr_dir} -> {new_path}")
     state.migrated += 1
+    if state.migrated % MIGRATE_COMMIT_EVERY == 0:
+        state.commit(conn)
     return True
 
 
+def _subdirs(directory: Path, prefix: str = "") -> list[Path]:
+    """List subdirectories using the d_type from scandir (no stat per entry).
+
+    Entries are filtered on their name before a Path is built for them.
+    """
+    with os.scandir(directory) as entries:
+        return [
+            Path(entry.path)
+            for entry in entries
+            if entry.name.startswith(prefix) and entry.is_dir()
+        ]
+
+
+def remove_migrated_dirs(state: MigrationState, workers: int = 8) -> None:
+    """Delete old directories queued during migration.
+
+    The queued PR directories are removed in parallel first; the old roots
+    that contain them are then removed once mostly empty.
+    """
+    queued = sorted(set(state.to_delete))
+    state.to_delete.clear()
+    # Sorted by parts, so a path's queued descendants directly follow it
+    parents = {a for a, b in itertools.pairwise(queued) if b.is_relative_to(a)}
+    leaves = [path for path in queued if path not in parents]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(functools.partial(shutil.rmtree, ignore_errors=True), leaves))
+    for path in sorted(parents, key=lambda p: len(p.parts), reverse=True):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _migrate_pr_dirs(
+    conn: sqlite3.Connection,
+    base_dir: Path,
+    pr_dirs: list[tuple[str, Path]],
+    role: str,
+    state: MigrationState,
+) -> None:
+    """Migrate pre-scanned (user, pr_dir) pairs in walk order.
+
+    meta.json files are read in a thread pool up to META_READ_AHEAD PRs ahead
+    of the serial moves and database writes, across repo boundaries.
+    """
+    with ThreadPoolExecutor(max_workers=META_WORKERS) as executor:
+        metas: deque[Future[dict[str, Any] | str]] = deque(
+            executor.submit(_read_pr_meta, pr_dir)
+            for _, pr_dir in pr_dirs[:META_READ_AHEAD]
+        )
+        for ahead, (user, pr_dir) in enumerate(pr_dirs, META_READ_AHEAD):
+            if ahead < len(pr_dirs):
+                metas.append(executor.submit(_read_pr_meta, pr_dirs[ahead][1]))
+            meta = metas.popleft().result()
+            migrate_pr_dir(conn, base_dir, pr_dir, role, user, state, meta)
+
+
 def migrate_directory(
     conn: sqlite3.Connection,
     base_dir: Path,
@@ -203,20 +379,16 @@ def migrate_directory(
 
     print(f"Migrating {old_dir.name}/...", file=sys.stderr)
 
-    for user_dir in old_dir.iterdir():
-        if not user_dir.is_dir():
-            continue
-        user = user_dir.name
-
-        for repo_dir in user_dir.iterdir():
-            if not repo_dir.is_dir():
-                continue
+    pr_dirs = [
+        (user_dir.name, pr_dir)
+        for user_dir in _subdirs(old_dir)
+        for repo_dir in _subdirs(user_dir)
+        for pr_dir in _subdirs(repo_dir, "pr")
+    ]
+    _migrate_pr_dirs(conn, base_dir, pr_dirs, role, state)
 
-            for pr_dir in repo_dir.iterdir():
-                if pr_dir.is_dir() and pr_dir.name.startswith("pr"):
-                    migrate_pr_dir(conn, base_dir, pr_dir, role, user, state)
-
-    shutil.rmtree(old_dir, ignore_errors=True)
+    state.commit(conn)
+    state.to_delete.append(old_dir)
 
 
 def migrate_prs_directory(
@@ -231,12 +403,12 @@ def migrate_prs_directory(
 
     print("Migrating prs/...", file=sys.stderr)
 
-    for repo_dir in old_prs.iterdir():
-        if not repo_dir.is_dir():
-            continue
-
-        for pr_dir in repo_dir.iterdir():
-            if pr_dir.is_dir() and pr_dir.name.startswith("pr"):
-                migrate_pr_dir(conn, base_dir, pr_dir, "single", "", state)
+    pr_dirs = [
+        ("", pr_dir)
+        for repo_dir in _subdirs(old_prs)
+        for pr_dir in _subdirs(repo_dir, "pr")
+    ]
+    _migrate_pr_dirs(conn, base_dir, pr_dirs, "single", state)
 
-    shutil.rmtree(old_prs, ignore_errors=True)
+    state.commit(conn)
+    state.to_delete.append(old_prs)
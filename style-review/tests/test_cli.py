@@ -0,0 +1,57 @@
+"""Tests for the style-review command line."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from style_review import cli
+from style_review.db import get_db
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+DUPLICATE_COLUMNS = "SELECT 1 AS id, 2 AS id, 3 AS x, 4 AS id"
+
+
+def run_query(
+    data_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+    sql: str,
+    fmt: str,
+) -> str:
+    """Run `style-review query` against data_dir and return its stdout."""
+    get_db(data_dir).close()
+    argv = ["style-review", "-o", str(data_dir), "query", sql, "--format", fmt]
+    monkeypatch.setattr("sys.argv", argv)
+    assert cli.main() == 0
+    out: str = capsys.readouterr().out
+    return out
+
+
+def test_query_json_duplicate_columns_keep_first(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    out = run_query(tmp_path, monkeypatch, capsys, DUPLICATE_COLUMNS, "json")
+    assert json.loads(out) == [{"id": 1, "x": 3}]
+    assert out == json.dumps([{"id": 1, "x": 3}], indent=2) + "\n"
+
+
+def test_query_duplicate_columns_show_first_value(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    cases = [
+        ("tsv", "id\tid\tx\tid\n1\t1\t3\t1\n"),
+        ("csv", '"id","id","x","id"\n1,1,3,1\n'),
+        ("table", "id | id | x | id\n---+----+---+---\n1  | 1  | 3 | 1 \n"),
+    ]
+    for fmt, expected in cases:
+        out = run_query(tmp_path, monkeypatch, capsys, DUPLICATE_COLUMNS, fmt)
+        assert out == expected, fmt